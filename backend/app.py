@@ -1,9 +1,29 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from routers import auth, service, favourite, comment, admin, user
+from routers import auth, service, favourite, comment, admin, user, image
+from core.images import shutdown_executor
+from core.jobs import job_runner
+from core.passwords import hasher
+from core.metrics import MetricsMiddleware, render_metrics
+from db import SessionLocal, dispose_engines, get_db_runner, pool_statistics
+from routers.auth import get_current_principal, require_admin
+from decouple import config
 
-app = FastAPI()
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_runner.start(SessionLocal, asyncio.get_running_loop())
+    yield
+    await asyncio.to_thread(job_runner.stop)
+    shutdown_executor()
+    hasher.shutdown()
+    await dispose_engines()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,12 +31,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+app.add_middleware(MetricsMiddleware)
 app.include_router(auth.router)
 app.include_router(admin.router)
 app.include_router(user.router)
 app.include_router(service.router)
 app.include_router(comment.router)
 app.include_router(favourite.router)
+app.include_router(image.router)
+
+async def metrics_access(request: Request, run=Depends(get_db_runner)):
+    authorization = request.headers.get('authorization', '')
+    if METRICS_TOKEN and secrets.compare_digest(authorization.encode(), f'Bearer {METRICS_TOKEN}'.encode()):
+        return
+    require_admin(await get_current_principal(request, run))
 
-app.mount("/res", StaticFiles(directory="res"), name="res")
\ No newline at end of file
+@app.get('/metrics', include_in_schema=False, dependencies=[Depends(metrics_access)])
+def metrics():
+    body, content_type = render_metrics(pool_statistics())
+    return Response(content=body, media_type=content_type)
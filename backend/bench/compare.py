@@ -0,0 +1,39 @@
+import argparse
+import json
+
+METRICS = ['throughput_per_s', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request']
+
+def load_results(path: str):
+    with open(path) as file:
+        report = json.load(file)
+    return {(result['endpoint'], result['concurrency']): result for result in report['results']}
+
+def change(before, after):
+    if before is None or after is None:
+        return None
+    return {"before": before, "after": after, "change_pct": round((after - before) / before * 100, 1) if before else None}
+
+def compare(baseline, candidate):
+    rows = []
+    for key in sorted(baseline.keys() & candidate.keys()):
+        endpoint, concurrency = key
+        rows.append({
+            "endpoint": endpoint,
+            "concurrency": concurrency,
+            **{metric: change(baseline[key].get(metric), candidate[key].get(metric)) for metric in METRICS},
+        })
+    return {
+        "results": rows,
+        "only_in_baseline": [list(key) for key in sorted(baseline.keys() - candidate.keys())],
+        "only_in_candidate": [list(key) for key in sorted(candidate.keys() - baseline.keys())],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff two benchmark reports produced by bench.load')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    args = parser.parse_args()
+    print(json.dumps(compare(load_results(args.baseline), load_results(args.candidate)), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+import httpx
+from sqlalchemy import event, func
+import db as database
+from db import SessionLocal
+import models
+from models.comment import Comment as CommentModel
+from models.favorite import Favorite as FavoriteModel
+from models.own_service import OwnService as OwnServiceModel
+from models.service import Service as ServiceModel
+from models.user import User as UserModel
+from core.cache import NullCacheBackend, response_cache
+from .seed import CITIES, WORDS
+from .stats import latency_summary
+
+SCENARIOS = {
+    'services_page': lambda rng, sample: f"/api/v1/service/?page={rng.randint(1, 50)}&limit=8",
+    'services_sorted': lambda rng, sample: f"/api/v1/service/?sort_by={rng.choice(['rating_desc', 'created_at_desc', 'favorites_desc'])}&limit=8",
+    'services_search': lambda rng, sample: f"/api/v1/service/?search={rng.choice(WORDS)}&limit=8",
+    'service_detail': lambda rng, sample: f"/api/v1/service/{rng.choice(sample['services'])}",
+    'services_nearby': lambda rng, sample: "/api/v1/service/nearby?lat={:.5f}&lon={:.5f}&radius_km=5".format(*rng.choice(CITIES)[1:]),
+    'service_comments': lambda rng, sample: f"/api/v1/comment/{rng.choice(sample['commented'])}",
+    'comments_recent': lambda rng, sample: "/api/v1/comment/?sort_by=created_at_desc&limit=100",
+    'business_comments': lambda rng, sample: f"/api/v1/comment/business/{rng.choice(sample['owners'])}?limit=100",
+    'business_stats': lambda rng, sample: f"/api/v1/comment/business/{rng.choice(sample['owners'])}/stats",
+    'user_favorites': lambda rng, sample: f"/api/v1/favorite/users/{rng.choice(sample['favoriters'])}",
+}
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self.lock:
+            self.count += 1
+
+    def attach(self):
+        engines = {database.engine, database.read_engine}
+        for async_engine in (database.async_engine, database.async_read_engine):
+            if async_engine is not None:
+                engines.add(async_engine.sync_engine)
+        for bind in engines:
+            event.listen(bind, 'before_cursor_execute', self)
+
+def sample_ids(size: int):
+    db = SessionLocal()
+    try:
+        def pick(query):
+            return [row[0] for row in query.order_by(func.random()).limit(size).all()] or [0]
+        return {
+            'services': pick(db.query(ServiceModel.id)),
+            'commented': pick(db.query(CommentModel.service_id).distinct()),
+            'owners': pick(db.query(OwnServiceModel.users_id).distinct()),
+            'favoriters': pick(db.query(FavoriteModel.users_id).distinct()),
+        }
+    finally:
+        db.close()
+
+def dataset_size():
+    db = SessionLocal()
+    try:
+        return {
+            model.__tablename__: db.query(func.count()).select_from(model).scalar()
+            for model in (ServiceModel, CommentModel, FavoriteModel, OwnServiceModel, UserModel)
+        }
+    finally:
+        db.close()
+
+async def run_scenario(client: httpx.AsyncClient, name: str, sample, concurrency: int, requests: int, warmup: int, rng, counter):
+    build_path = SCENARIOS[name]
+    for _ in range(warmup):
+        await client.get(build_path(rng, sample))
+
+    latencies = []
+    statuses = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def attempt(path):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                statuses[str(response.status_code)] += 1
+                if response.status_code < 400:
+                    latencies.append(time.perf_counter() - started)
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+
+    paths = [build_path(rng, sample) for _ in range(requests)]
+    statements_before = counter.count if counter else None
+    started = time.perf_counter()
+    await asyncio.gather(*(attempt(path) for path in paths))
+    elapsed = time.perf_counter() - started
+    return {
+        "endpoint": name,
+        "concurrency": concurrency,
+        "requests": requests,
+        "succeeded": len(latencies),
+        "statuses": dict(statuses),
+        **latency_summary(latencies, elapsed),
+        "queries_per_request": round((counter.count - statements_before) / requests, 2) if counter else None,
+    }
+
+async def run_inprocess(args, sample, rng):
+    from app import app
+    counter = StatementCounter()
+    counter.attach()
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=args.timeout) as client:
+            return [
+                await run_scenario(client, name, sample, concurrency, args.requests, args.warmup, rng, counter)
+                for name in args.endpoints for concurrency in args.concurrency
+            ]
+
+async def run_http(args, sample, rng):
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        return [
+            await run_scenario(client, name, sample, concurrency, args.requests, args.warmup, rng, None)
+            for name in args.endpoints for concurrency in args.concurrency
+        ]
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure endpoint latency, throughput and queries per request')
+    parser.add_argument('--mode', choices=['inprocess', 'http'], default='inprocess')
+    parser.add_argument('--base-url', default='http://localhost:8000', help='Server to drive in http mode')
+    parser.add_argument('--endpoints', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per endpoint and concurrency level')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--sample-size', type=int, default=1000, help='Number of ids sampled from the database for path parameters')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the response cache when running in process')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sample = sample_ids(args.sample_size)
+    if args.no_cache:
+        response_cache.backend = NullCacheBackend()
+    runner = run_inprocess if args.mode == 'inprocess' else run_http
+    results = asyncio.run(runner(args, sample, rng))
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "mode": args.mode,
+        "database": database.engine.dialect.name,
+        "response_cache": type(response_cache.backend).__name__ if args.mode == 'inprocess' else None,
+        "dataset": dataset_size(),
+        "seed": args.seed,
+        "results": results,
+    }
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(body)
+    else:
+        print(body)
+
+if __name__ == '__main__':
+    main()
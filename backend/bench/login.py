@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import json
+import time
+from fastapi import HTTPException
+from core.passwords import hasher, pwd_context, verify_password
+from .stats import latency_summary
+
+async def run_level(hashed: str, concurrency: int, requests: int):
+    latencies = []
+    rejected = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def attempt():
+        nonlocal rejected
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await verify_password('benchmark-password', hashed)
+                latencies.append(time.perf_counter() - started)
+            except HTTPException:
+                rejected += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(attempt() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "accepted": len(latencies),
+        "rejected": rejected,
+        **latency_summary(latencies, elapsed),
+    }
+
+async def main_async(levels, requests):
+    hashed = pwd_context.hash('benchmark-password')
+    results = []
+    for concurrency in levels:
+        results.append(await run_level(hashed, concurrency, requests))
+    return {"hasher": hasher.stats(), "results": results}
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure password verification throughput under concurrency')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--requests', type=int, default=64)
+    args = parser.parse_args()
+    report = asyncio.run(main_async(args.concurrency, args.requests))
+    hasher.shutdown()
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
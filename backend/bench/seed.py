@@ -0,0 +1,215 @@
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, text
+from db import Base, SessionLocal, engine
+import models
+from models.comment import Comment as CommentModel
+from models.favorite import Favorite as FavoriteModel
+from models.own_service import OwnService as OwnServiceModel
+from models.service import Service as ServiceModel
+from models.service_image import ServiceImage as ServiceImageModel, hash_image_url
+from models.user import User as UserModel
+from core.geo import geo_cell
+from core.ingest import SERVICE_COLUMNS, insert_rows
+from core.passwords import hash_password_sync, hasher
+from core.ratings import rebuild_ratings
+from core.text import build_search_text
+
+BENCH_PASSWORD = 'benchmark-password'
+SERVICE_TYPES = ['hotel', 'restaurant', 'tour', 'attraction', 'transport', 'spa']
+CITIES = [
+    ('Hà Nội', 21.0285, 105.8542),
+    ('Hồ Chí Minh', 10.7769, 106.7009),
+    ('Đà Nẵng', 16.0544, 108.2022),
+    ('Huế', 16.4637, 107.5909),
+    ('Hội An', 15.8801, 108.3380),
+    ('Nha Trang', 12.2388, 109.1967),
+    ('Đà Lạt', 11.9404, 108.4583),
+    ('Phú Quốc', 10.2899, 103.9840),
+]
+WORDS = [
+    'view', 'biển', 'núi', 'phố cổ', 'gia đình', 'giá rẻ', 'sang trọng', 'yên tĩnh',
+    'đặc sản', 'hải sản', 'cà phê', 'trekking', 'lịch sử', 'chợ đêm', 'thư giãn', 'ẩm thực',
+]
+USER_COLUMNS = ['id', 'full_name', 'age', 'user_name', 'password', 'role']
+COMMENT_COLUMNS = ['service_id', 'users_id', 'title', 'content', 'rating', 'created_at']
+
+def sentence(rng: random.Random, length: int):
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+def batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def next_id(db, model):
+    return (db.query(func.max(model.id)).scalar() or 0) + 1
+
+def sync_sequence(db, table: str):
+    if db.get_bind().dialect.name == 'postgresql':
+        db.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"))
+
+def user_rows(first_id: int, count: int, role: str, password: str, rng: random.Random):
+    for offset in range(count):
+        user_id = first_id + offset
+        yield {
+            'id': user_id,
+            'full_name': f'Bench {role.title()} {user_id}',
+            'age': rng.randint(18, 70),
+            'user_name': f'bench_{role}_{user_id}',
+            'password': password,
+            'role': role,
+        }
+
+def service_values(service_id: int, rng: random.Random, now: datetime, history_days: int):
+    city, lat, lon = rng.choice(CITIES)
+    service_type = rng.choice(SERVICE_TYPES)
+    lat += rng.uniform(-0.15, 0.15)
+    lon += rng.uniform(-0.15, 0.15)
+    name = f'{service_type.title()} {city} {service_id}'
+    description = sentence(rng, 24)
+    address = f'{rng.randint(1, 999)} {rng.choice(WORDS)}, {city}'
+    return {
+        'id': service_id,
+        'name': name,
+        'description': description,
+        'address': address,
+        'geolocation': f'{lat:.6f}, {lon:.6f}',
+        'type': service_type,
+        'phone': f'0{rng.randint(100000000, 999999999)}',
+        'website': f'https://bench.example/{service_id}',
+        'email': f'service{service_id}@bench.example',
+        'created_at': now - timedelta(days=rng.uniform(0, history_days)),
+        'search_text': build_search_text(name, description, address),
+        'latitude': lat,
+        'longitude': lon,
+        'geo_cell': geo_cell(lat, lon),
+        'favorite_count': 0,
+    }
+
+def spread(total: int, buckets: int):
+    base, remainder = divmod(total, buckets)
+    return [base + (1 if index < remainder else 0) for index in range(buckets)]
+
+def pair_rows(user_ids, service_ids, total: int, rng: random.Random):
+    per_user = spread(total, len(user_ids))
+    for user_id, count in zip(user_ids, per_user):
+        for position in rng.sample(range(len(service_ids)), min(count, len(service_ids))):
+            yield user_id, service_ids[position]
+
+def comment_rows(user_ids, service_ids, total: int, rng: random.Random, now: datetime, history_days: int):
+    for user_id, service_id in pair_rows(user_ids, service_ids, total, rng):
+        rating = rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 3, 6, 5])[0]
+        yield {
+            'service_id': service_id,
+            'users_id': user_id,
+            'title': sentence(rng, 3),
+            'content': sentence(rng, 18),
+            'rating': rating,
+            'created_at': now - timedelta(days=rng.uniform(0, history_days)),
+        }
+
+def write(db, model, columns, rows, batch_size: int):
+    written = 0
+    for batch in batches(rows, batch_size):
+        insert_rows(db, model, columns, batch)
+        db.commit()
+        written += len(batch)
+    return written
+
+def seed(db, args):
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    password = hash_password_sync(BENCH_PASSWORD)
+    counts = {}
+
+    first_user = next_id(db, UserModel)
+    counts['owners'] = write(db, UserModel, USER_COLUMNS, user_rows(first_user, args.owners, 'business', password, rng), args.batch_size)
+    counts['tourists'] = write(
+        db, UserModel, USER_COLUMNS,
+        user_rows(first_user + args.owners, args.users, 'tourist', password, rng), args.batch_size
+    )
+    sync_sequence(db, 'users')
+    owner_ids = list(range(first_user, first_user + args.owners))
+    tourist_ids = list(range(first_user + args.owners, first_user + args.owners + args.users))
+
+    first_service = next_id(db, ServiceModel)
+    service_ids = list(range(first_service, first_service + args.services))
+    counts['services'] = write(
+        db, ServiceModel, SERVICE_COLUMNS,
+        (service_values(service_id, rng, now, args.history_days) for service_id in service_ids), args.batch_size
+    )
+    sync_sequence(db, 'service')
+    counts['own_services'] = write(db, OwnServiceModel, ['users_id', 'service_id'], (
+        {'users_id': owner_ids[index % len(owner_ids)], 'service_id': service_id}
+        for index, service_id in enumerate(service_ids)
+    ), args.batch_size)
+
+    image_urls = (
+        (service_id, f'/api/v1/service/images/bench-{service_id}.jpg')
+        for service_id in service_ids if rng.random() < args.image_ratio
+    )
+    counts['images'] = write(db, ServiceImageModel, ['service_id', 'image_hash', 'image_url'], (
+        {'service_id': service_id, 'image_hash': hash_image_url(url), 'image_url': url} for service_id, url in image_urls
+    ), args.batch_size)
+    counts['comments'] = write(
+        db, CommentModel, COMMENT_COLUMNS,
+        comment_rows(tourist_ids, service_ids, args.comments, rng, now, args.history_days), args.batch_size
+    )
+    counts['favorites'] = write(db, FavoriteModel, ['users_id', 'service_id'], (
+        {'users_id': user_id, 'service_id': service_id}
+        for user_id, service_id in pair_rows(tourist_ids, service_ids, args.favorites, rng)
+    ), args.batch_size)
+
+    rebuild_ratings(db)
+    favorite_count = select(func.count()).where(
+        FavoriteModel.service_id == ServiceModel.id
+    ).correlate(ServiceModel).scalar_subquery()
+    db.query(ServiceModel).update({'favorite_count': favorite_count}, synchronize_session=False)
+    db.commit()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed the configured database with a synthetic tourism dataset')
+    parser.add_argument('--services', type=int, default=100_000)
+    parser.add_argument('--comments', type=int, default=2_000_000)
+    parser.add_argument('--favorites', type=int, default=500_000)
+    parser.add_argument('--users', type=int, default=50_000, help='Number of tourist accounts writing comments and favorites')
+    parser.add_argument('--owners', type=int, default=2_000, help='Number of business accounts owning services')
+    parser.add_argument('--image-ratio', type=float, default=0.9, help='Share of services that get an image row')
+    parser.add_argument('--history-days', type=int, default=365)
+    parser.add_argument('--batch-size', type=int, default=5_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='Drop and recreate every table before seeding')
+    args = parser.parse_args()
+    if args.owners < 1 or args.users < 1:
+        parser.error('--owners and --users must be at least 1')
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        counts = seed(db, args)
+    finally:
+        db.close()
+        hasher.shutdown()
+    print(json.dumps({
+        "database": engine.dialect.name,
+        "seed": args.seed,
+        "rows": counts,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
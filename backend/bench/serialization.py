@@ -0,0 +1,114 @@
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+from pydantic import TypeAdapter
+from schemas.comment import Comment as CommentSchema
+from schemas.service import Service as ServiceSchema
+from core.serialization import dumps, rows_to_dicts
+from .seed import CITIES, SERVICE_TYPES, WORDS, sentence
+
+SERVICE_KEYS = (
+    'id', 'name', 'address', 'geolocation', 'website', 'type', 'description', 'email', 'phone', 'created_at',
+    'favorite_count',
+)
+COMMENT_KEYS = ('title', 'content', 'rating', 'service_id', 'users_id', 'created_at', 'full_name')
+
+def service_rows(count: int, rng: random.Random):
+    now = datetime.utcnow()
+    rows = []
+    for service_id in range(1, count + 1):
+        city, lat, lon = rng.choice(CITIES)
+        rows.append((
+            service_id, f'Service {city} {service_id}', f'{service_id} {city}', f'{lat}, {lon}',
+            f'https://bench.example/{service_id}', rng.choice(SERVICE_TYPES), sentence(rng, 24),
+            f'service{service_id}@bench.example', '0123456789', now - timedelta(days=service_id % 365),
+            rng.randint(0, 500),
+        ))
+    return rows
+
+def service_extras(service_id: int):
+    urls = [f'http://localhost:8000/api/v1/service/images/{service_id}-{index}.jpg' for index in range(3)]
+    return {
+        'image_urls': urls,
+        'thumbnail_urls': [url.replace('.jpg', '.thumb.webp') for url in urls],
+        'card_image_urls': [url.replace('.jpg', '.card.webp') for url in urls],
+        'average_rating': 4.2,
+        'rating_count': 17,
+        'rating_histogram': [1, 1, 2, 6, 7],
+    }
+
+def comment_rows(count: int, rng: random.Random):
+    now = datetime.utcnow()
+    return [
+        (sentence(rng, 3), sentence(rng, 18), rng.randint(1, 5), index % 997 + 1, index + 1,
+         now - timedelta(minutes=index), f'Bench Tourist {index}')
+        for index in range(count)
+    ]
+
+def orm_services(rows):
+    services = []
+    for row in rows:
+        service = SimpleNamespace(**dict(zip(SERVICE_KEYS, row)))
+        for key, value in service_extras(service.id).items():
+            setattr(service, key, value)
+        services.append(service)
+    return services
+
+def fast_services(rows):
+    services = rows_to_dicts(rows, SERVICE_KEYS)
+    for service in services:
+        service.update(service_extras(service['id']))
+    return services
+
+def response_model_json(adapter: TypeAdapter, data):
+    validated = adapter.validate_python(data, from_attributes=True)
+    return json.dumps(adapter.dump_python(validated, mode='json'), ensure_ascii=False, separators=(',', ':'))
+
+def scenarios(service_data, comment_data):
+    service_adapter = TypeAdapter(List[ServiceSchema])
+    comment_adapter = TypeAdapter(List[CommentSchema])
+    return {
+        'services_before': lambda: response_model_json(service_adapter, orm_services(service_data)),
+        'services_after': lambda: dumps(fast_services(service_data)),
+        'comments_before': lambda: response_model_json(
+            comment_adapter, [CommentSchema(**dict(zip(COMMENT_KEYS, row))) for row in comment_data]
+        ),
+        'comments_after': lambda: dumps(rows_to_dicts(comment_data, COMMENT_KEYS)),
+    }
+
+def measure(fn, repeat: int):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), sorted(timings)[len(timings) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare list serialization cost before and after the single-pass path')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = {}
+    for name, fn in scenarios(service_rows(args.rows, rng), comment_rows(args.rows, rng)).items():
+        best, median = measure(fn, args.repeat)
+        scale = 1000 / args.rows
+        results[name] = {
+            "best_ms_per_1000_rows": round(best * scale * 1000, 3),
+            "median_ms_per_1000_rows": round(median * scale * 1000, 3),
+        }
+    for kind in ('services', 'comments'):
+        before, after = results[f'{kind}_before'], results[f'{kind}_after']
+        results[f'{kind}_speedup'] = round(before["median_ms_per_1000_rows"] / after["median_ms_per_1000_rows"], 2)
+    print(json.dumps({"rows": args.rows, "repeat": args.repeat, "results": results}, indent=2))
+
+if __name__ == '__main__':
+    main()
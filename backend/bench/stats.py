@@ -0,0 +1,19 @@
+import statistics
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def milliseconds(value):
+    return round(value * 1000, 2) if value is not None else None
+
+def latency_summary(latencies, elapsed: float):
+    return {
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": milliseconds(statistics.fmean(latencies)) if latencies else None,
+        "p50_ms": milliseconds(statistics.median(latencies)) if latencies else None,
+        "p95_ms": milliseconds(percentile(latencies, 0.95)),
+        "p99_ms": milliseconds(percentile(latencies, 0.99)),
+    }
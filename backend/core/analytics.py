@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from models.comment import Comment as CommentModel
+from models.own_service import OwnService as OwnServiceModel
+from models.service import Service as ServiceModel
+from models.service_rating import ServiceRating as ServiceRatingModel
+from .ratings import RATING_VALUES, rating_payload
+
+BUCKET_DAYS = {'day': 1, 'week': 7, 'month': 31}
+
+def service_owner_ids(db: Session, *service_ids: int):
+    return [user_id for (user_id,) in db.query(OwnServiceModel.users_id).filter(
+        OwnServiceModel.service_id.in_(service_ids)
+    ).distinct().all()]
+
+def time_bucket(db: Session, column, bucket: str):
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return func.to_char(func.date_trunc(bucket, column), 'YYYY-MM-DD')
+    if dialect == 'sqlite':
+        if bucket == 'month':
+            return func.strftime('%Y-%m-01', column)
+        if bucket == 'week':
+            return func.date(column, 'weekday 0', '-6 days')
+        return func.strftime('%Y-%m-%d', column)
+    return func.date(column)
+
+def average(total, count):
+    return round(total / count, 3) if count else None
+
+def service_breakdown(db: Session, user_id: int):
+    rows = db.query(ServiceModel.id, ServiceModel.name, ServiceRatingModel).join(
+        OwnServiceModel, OwnServiceModel.service_id == ServiceModel.id
+    ).outerjoin(
+        ServiceRatingModel, ServiceRatingModel.service_id == ServiceModel.id
+    ).filter(OwnServiceModel.users_id == user_id).order_by(ServiceModel.id).all()
+    return [{"service_id": service_id, "name": name, **rating_payload(rating)} for service_id, name, rating in rows]
+
+def overall_summary(services):
+    histogram = [sum(service["rating_histogram"][index] for service in services) for index in range(len(RATING_VALUES))]
+    count = sum(histogram)
+    total = sum(value * histogram[index] for index, value in enumerate(RATING_VALUES))
+    return {
+        "rating_count": sum(service["rating_count"] for service in services),
+        "average_rating": average(total, count),
+        "rating_histogram": histogram,
+    }
+
+def owner_comments(db: Session, user_id: int, *columns):
+    return db.query(*columns).select_from(CommentModel).join(
+        OwnServiceModel, OwnServiceModel.service_id == CommentModel.service_id
+    ).filter(OwnServiceModel.users_id == user_id)
+
+def review_timeline(db: Session, user_id: int, bucket: str, periods: int, now: datetime):
+    since = now - timedelta(days=BUCKET_DAYS[bucket] * periods)
+    bucket_column = time_bucket(db, CommentModel.created_at, bucket).label('bucket')
+    rows = owner_comments(
+        db, user_id, bucket_column, func.count(), func.avg(CommentModel.rating)
+    ).filter(CommentModel.created_at >= since).group_by(bucket_column).order_by(bucket_column).all()
+    return [
+        {"bucket": str(label), "review_count": count, "average_rating": round(float(avg), 3) if avg is not None else None}
+        for label, count, avg in rows
+    ]
+
+def recent_trend(db: Session, user_id: int, window_days: int, now: datetime):
+    recent_start = now - timedelta(days=window_days)
+    previous_start = recent_start - timedelta(days=window_days)
+    in_recent = CommentModel.created_at >= recent_start
+    in_previous = (CommentModel.created_at >= previous_start) & (CommentModel.created_at < recent_start)
+    rated = CommentModel.rating.isnot(None)
+    row = owner_comments(
+        db, user_id,
+        func.coalesce(func.sum(case((in_recent, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((in_previous, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((in_recent & rated, CommentModel.rating), else_=0)), 0),
+        func.coalesce(func.sum(case((in_recent & rated, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((in_previous & rated, CommentModel.rating), else_=0)), 0),
+        func.coalesce(func.sum(case((in_previous & rated, 1), else_=0)), 0),
+    ).filter(CommentModel.created_at >= previous_start).one()
+    recent_count, previous_count, recent_sum, recent_rated, previous_sum, previous_rated = [int(value) for value in row]
+    recent_average = average(recent_sum, recent_rated)
+    previous_average = average(previous_sum, previous_rated)
+    return {
+        "window_days": window_days,
+        "recent_count": recent_count,
+        "previous_count": previous_count,
+        "count_delta": recent_count - previous_count,
+        "recent_average": recent_average,
+        "previous_average": previous_average,
+        "average_delta": round(recent_average - previous_average, 3)
+        if recent_average is not None and previous_average is not None else None,
+    }
+
+def business_stats(db: Session, user_id: int, bucket: str = 'week', periods: int = 12, window_days: int = 30):
+    now = datetime.utcnow()
+    services = service_breakdown(db, user_id)
+    return {
+        "user_id": user_id,
+        "services": services,
+        "overall": overall_summary(services),
+        "timeline": review_timeline(db, user_id, bucket, periods, now),
+        "trend": recent_trend(db, user_id, window_days, now),
+    }
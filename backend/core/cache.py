@@ -0,0 +1,162 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from decouple import config
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+from .serialization import dumps
+
+RESPONSE_CACHE_BACKEND = config('RESPONSE_CACHE_BACKEND', default='memory')
+RESPONSE_CACHE_URL = config('RESPONSE_CACHE_URL', default='redis://localhost:6379/0')
+RESPONSE_CACHE_TTL = config('RESPONSE_CACHE_TTL', default=300, cast=int)
+RESPONSE_CACHE_SIZE = config('RESPONSE_CACHE_SIZE', default=2048, cast=int)
+TAG_VERSION_TTL = 7 * 24 * 3600
+
+class MemoryCacheBackend:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    async def get_many(self, keys):
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                if key in self._counters:
+                    values.append(self._counters[key])
+                    continue
+                entry = self._entries.get(key)
+                if entry is None or (entry[1] is not None and entry[1] <= now):
+                    values.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                values.append(entry[0])
+        return values
+
+    async def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, expires_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    async def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class RedisCacheBackend:
+    def __init__(self, url: str):
+        from redis import asyncio as redis
+
+        self.client = redis.from_url(url)
+
+    async def get_many(self, keys):
+        values = await self.client.mget(keys)
+        return [value.decode('utf-8') if isinstance(value, bytes) else value for value in values]
+
+    async def set(self, key, value, ttl=None):
+        await self.client.set(key, value, ex=ttl)
+
+    async def incr(self, key):
+        value = await self.client.incr(key)
+        await self.client.expire(key, TAG_VERSION_TTL)
+        return value
+
+    async def clear(self):
+        await self.client.flushdb()
+
+class NullCacheBackend:
+    async def get_many(self, keys):
+        return [None] * len(keys)
+
+    async def set(self, key, value, ttl=None):
+        return None
+
+    async def incr(self, key):
+        return 0
+
+    async def clear(self):
+        return None
+
+def create_backend(name: str):
+    if name == 'redis':
+        return RedisCacheBackend(RESPONSE_CACHE_URL)
+    if name == 'none':
+        return NullCacheBackend()
+    return MemoryCacheBackend(RESPONSE_CACHE_SIZE)
+
+def etag_for(body: str):
+    return f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"'
+
+def etag_matches(header, etag: str):
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+class ResponseCache:
+    def __init__(self, backend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self._adapters = {}
+
+    def adapter(self, response_model):
+        if response_model not in self._adapters:
+            self._adapters[response_model] = TypeAdapter(response_model)
+        return self._adapters[response_model]
+
+    def serialize(self, data, response_model):
+        if response_model is None:
+            return dumps(data)
+        adapter = self.adapter(response_model)
+        return adapter.dump_json(adapter.validate_python(data, from_attributes=True)).decode('utf-8')
+
+    async def entry_key(self, request: Request, tags):
+        versions = await self.backend.get_many([f'tag:{tag}' for tag in tags])
+        query = '&'.join(sorted(f'{key}={value}' for key, value in request.query_params.multi_items()))
+        version_part = ','.join(str(version or 0) for version in versions)
+        return f'resp:{request.url.path}?{query}|{version_part}'
+
+    async def respond(self, request: Request, tags, produce, response_model=None):
+        key = await self.entry_key(request, tags)
+        cached = (await self.backend.get_many([key]))[0]
+        if cached is not None:
+            entry = json.loads(cached) if isinstance(cached, str) else cached
+        else:
+            data, headers = await produce()
+            body = self.serialize(data, response_model)
+            entry = {'body': body, 'etag': etag_for(body), 'headers': headers or {}}
+            await self.backend.set(key, json.dumps(entry) if isinstance(self.backend, RedisCacheBackend) else entry, self.ttl)
+
+        headers = dict(entry['headers'])
+        headers['ETag'] = entry['etag']
+        headers['Cache-Control'] = 'no-cache'
+        if etag_matches(request.headers.get('if-none-match'), entry['etag']):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=entry['body'], media_type='application/json', headers=headers)
+
+    async def invalidate(self, *tags):
+        for tag in tags:
+            await self.backend.incr(f'tag:{tag}')
+
+response_cache = ResponseCache(create_backend(RESPONSE_CACHE_BACKEND), RESPONSE_CACHE_TTL)
+
+
+def service_tags(service_id: int):
+    return ('services', f'service:{service_id}')
+
+def comment_tags(service_id: int):
+    return ('services', f'service:{service_id}', f'comments:{service_id}')
+
+def business_tags(*user_ids: int):
+    return tuple(f'business:{user_id}' for user_id in user_ids)
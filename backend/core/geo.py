@@ -0,0 +1,59 @@
+import math
+import re
+
+EARTH_RADIUS_KM = 6371.0088
+GEO_CELL_DEGREES = 0.05
+KM_PER_DEGREE_LAT = 110.574
+COORDINATE_PATTERN = re.compile(r'(-?\d{1,3}(?:\.\d+)?)\s*[,;\s]\s*(-?\d{1,3}(?:\.\d+)?)')
+
+def parse_geolocation(value):
+    if not value:
+        return None
+    for match in COORDINATE_PATTERN.finditer(value):
+        lat, lon = float(match.group(1)), float(match.group(2))
+        if -90 <= lat <= 90 and -180 <= lon <= 180:
+            return lat, lon
+    return None
+
+def cell_index(lat: float, lon: float):
+    return math.floor(lat / GEO_CELL_DEGREES), math.floor(lon / GEO_CELL_DEGREES)
+
+def cell_key(lat_index: int, lon_index: int):
+    return f'{lat_index}:{lon_index}'
+
+def geo_cell(lat: float, lon: float):
+    return cell_key(*cell_index(lat, lon))
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def bounding_box(lat: float, lon: float, radius_km: float):
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    d_lon = min(radius_km / (111.320 * cos_lat), 180.0)
+    return max(lat - d_lat, -90.0), min(lat + d_lat, 90.0), max(lon - d_lon, -180.0), min(lon + d_lon, 180.0)
+
+def cells_in_box(min_lat, max_lat, min_lon, max_lon):
+    min_i, min_j = cell_index(min_lat, min_lon)
+    max_i, max_j = cell_index(max_lat, max_lon)
+    return [cell_key(i, j) for i in range(min_i, max_i + 1) for j in range(min_j, max_j + 1)]
+
+def ring_cells(lat: float, lon: float, ring: int):
+    center_i, center_j = cell_index(lat, lon)
+    if ring == 0:
+        return [cell_key(center_i, center_j)]
+    cells = []
+    for i in range(center_i - ring, center_i + ring + 1):
+        for j in range(center_j - ring, center_j + ring + 1):
+            if max(abs(i - center_i), abs(j - center_j)) == ring:
+                cells.append(cell_key(i, j))
+    return cells
+
+def ring_coverage_km(lat: float, ring: int):
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    cell_km = GEO_CELL_DEGREES * min(KM_PER_DEGREE_LAT, 111.320 * cos_lat)
+    return ring * cell_km
@@ -0,0 +1,140 @@
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from decouple import config
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from .images import UPLOAD_DIR, original_for_variant
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+FALLBACK_CACHE_CONTROL = 'public, max-age=60'
+STREAM_CHUNK_SIZE = 64 * 1024
+HOT_IMAGE_MAX_BYTES = config('HOT_IMAGE_MAX_BYTES', default=256 * 1024, cast=int)
+HOT_IMAGE_CACHE_BYTES = config('HOT_IMAGE_CACHE_BYTES', default=64 * 1024 * 1024, cast=int)
+
+class ImageLRU:
+    def __init__(self, capacity_bytes: int):
+        self.capacity_bytes = capacity_bytes
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, mtime_ns: int):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != mtime_ns:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, mtime_ns: int, content: bytes):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= len(previous[1])
+            self._entries[key] = (mtime_ns, content)
+            self.size_bytes += len(content)
+            while self.size_bytes > self.capacity_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size_bytes -= len(evicted)
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size_bytes -= len(entry[1])
+
+hot_images = ImageLRU(HOT_IMAGE_CACHE_BYTES)
+
+def strong_etag(path: Path, size: int, mtime_ns: int):
+    digest = hashlib.sha1(f'{path.name}:{size}:{mtime_ns}'.encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+def etag_matches(header: Optional[str], etag: str):
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+def parse_range(header: Optional[str], size: int):
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start, _, end = header[len('bytes='):].strip().partition('-')
+    try:
+        if start == '':
+            length = int(end)
+            if length <= 0:
+                return 'invalid'
+            return max(size - length, 0), size - 1
+        first = int(start)
+        last = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if first >= size or last < first:
+        return 'invalid'
+    return first, min(last, size - 1)
+
+def read_file_range(path: Path, start: int, end: int):
+    with path.open('rb') as handle:
+        handle.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = handle.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def serve_image(request: Request, path: Path, immutable: bool = True):
+    stat = path.stat()
+    size = stat.st_size
+    etag = strong_etag(path, size, stat.st_mtime_ns)
+    headers = {
+        'ETag': etag,
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL if immutable else FALLBACK_CACHE_CONTROL,
+        'Accept-Ranges': 'bytes',
+    }
+    media_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get('if-range')
+    if if_range is None or if_range == etag:
+        byte_range = parse_range(request.headers.get('range'), size)
+    if byte_range == 'invalid':
+        headers['Content-Range'] = f'bytes */{size}'
+        return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers=headers)
+
+    start, end = byte_range or (0, size - 1)
+    status_code = status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK
+    if byte_range:
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if request.method == 'HEAD':
+        headers['Content-Length'] = str(end - start + 1 if size else 0)
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+    if size <= HOT_IMAGE_MAX_BYTES:
+        key = str(path)
+        content = hot_images.get(key, stat.st_mtime_ns)
+        if content is None:
+            content = path.read_bytes()
+            hot_images.put(key, stat.st_mtime_ns, content)
+        return Response(content=content[start:end + 1], status_code=status_code, headers=headers, media_type=media_type)
+
+    headers['Content-Length'] = str(end - start + 1)
+    return StreamingResponse(read_file_range(path, start, end), status_code=status_code, headers=headers, media_type=media_type)
+
+def image_response(request: Request, filename: str):
+    if not filename.startswith('.') and '/' not in filename:
+        path = UPLOAD_DIR / filename
+        if path.is_file():
+            return serve_image(request, path)
+        original = original_for_variant(filename)
+        if original is not None:
+            return serve_image(request, original, immutable=False)
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
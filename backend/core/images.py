@@ -0,0 +1,165 @@
+import logging
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from decouple import config
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_DIR = Path('res')
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+IMAGE_URL_PREFIX = '/api/v1/service/images/'
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = config('MAX_UPLOAD_BYTES', default=10 * 1024 * 1024, cast=int)
+THUMBNAIL_WORKERS = config('THUMBNAIL_WORKERS', default=2, cast=int)
+
+ALLOWED_IMAGE_TYPES = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'webp': 'image/webp',
+    'gif': 'image/gif',
+}
+IMAGE_SIGNATURES = {
+    'image/jpeg': (b'\xff\xd8\xff',),
+    'image/png': (b'\x89PNG\r\n\x1a\n',),
+    'image/gif': (b'GIF87a', b'GIF89a'),
+}
+IMAGE_VARIANTS = {
+    'thumb': 320,
+    'card': 800,
+    'full': 1920,
+}
+VARIANT_FORMAT = 'webp'
+
+_executor = None
+
+def matches_signature(content_type: str, head: bytes):
+    if content_type == 'image/webp':
+        return head[:4] == b'RIFF' and head[8:12] == b'WEBP'
+    return any(head.startswith(signature) for signature in IMAGE_SIGNATURES[content_type])
+
+def upload_extension(file: UploadFile):
+    extension = (file.filename or '').rsplit('.', 1)[-1].lower()
+    if extension not in ALLOWED_IMAGE_TYPES:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Unsupported image type")
+    if file.content_type and file.content_type != ALLOWED_IMAGE_TYPES[extension]:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Image type does not match file extension")
+    return extension
+
+async def save_upload(file: UploadFile, upload_dir: Path = UPLOAD_DIR):
+    extension = upload_extension(file)
+    filename = f"{uuid.uuid4()}.{extension}"
+    file_path = upload_dir / filename
+    partial_path = upload_dir / f".{filename}.part"
+
+    handle = await run_in_threadpool(partial_path.open, 'wb')
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if size == 0 and not matches_signature(ALLOWED_IMAGE_TYPES[extension], chunk[:16]):
+                raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="File content is not a valid image")
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Image is too large")
+            await run_in_threadpool(handle.write, chunk)
+        if size == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
+        await run_in_threadpool(handle.close)
+        await run_in_threadpool(os.replace, partial_path, file_path)
+    except BaseException:
+        await run_in_threadpool(handle.close)
+        await run_in_threadpool(partial_path.unlink, True)
+        raise
+    return filename
+
+def variant_filename(filename: str, variant: str):
+    return f"{filename.rsplit('.', 1)[0]}_{variant}.{VARIANT_FORMAT}"
+
+def variant_url(url: str, variant: str):
+    filename = local_image_filename(url)
+    if filename is None:
+        return url
+    return f"{IMAGE_URL_PREFIX}{variant_filename(filename, variant)}"
+
+def image_references(filename: str):
+    if filename.startswith('.'):
+        return []
+    stem, _, extension = filename.rpartition('.')
+    base, _, variant = stem.rpartition('_')
+    if extension == VARIANT_FORMAT and variant in IMAGE_VARIANTS:
+        return [f"{IMAGE_URL_PREFIX}{base}.{original_extension}" for original_extension in ALLOWED_IMAGE_TYPES]
+    return [f"{IMAGE_URL_PREFIX}{filename}"]
+
+def local_image_filename(url: str):
+    if not url.startswith(IMAGE_URL_PREFIX):
+        return None
+    filename = url[len(IMAGE_URL_PREFIX):]
+    if not filename or '/' in filename or filename.startswith('.'):
+        return None
+    return filename
+
+def remove_image_files(filename: str, upload_dir: Path = UPLOAD_DIR):
+    names = [filename] + [variant_filename(filename, variant) for variant in IMAGE_VARIANTS]
+    for name in names:
+        (upload_dir / name).unlink(missing_ok=True)
+    return names
+
+def original_for_variant(filename: str, upload_dir: Path = UPLOAD_DIR):
+    stem, _, extension = filename.rpartition('.')
+    base, _, variant = stem.rpartition('_')
+    if extension != VARIANT_FORMAT or variant not in IMAGE_VARIANTS:
+        return None
+    for original_extension in ALLOWED_IMAGE_TYPES:
+        candidate = upload_dir / f"{base}.{original_extension}"
+        if candidate.is_file():
+            return candidate
+    return None
+
+def render_variants(path: str):
+    from PIL import Image, ImageOps
+
+    source = Path(path)
+    written = []
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        for variant, max_size in IMAGE_VARIANTS.items():
+            target = source.with_name(variant_filename(source.name, variant))
+            resized = image.copy()
+            resized.thumbnail((max_size, max_size))
+            partial = target.with_name(f".{target.name}.part")
+            resized.save(partial, format=VARIANT_FORMAT.upper(), quality=80, method=4)
+            os.replace(partial, target)
+            written.append(target.name)
+    return written
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+    return _executor
+
+def schedule_variants(filename: str, upload_dir: Path = UPLOAD_DIR):
+    future = get_executor().submit(render_variants, str(upload_dir / filename))
+    future.add_done_callback(log_variant_failure)
+    return future
+
+def log_variant_failure(future):
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logging.error(f"Image variant generation failed: {error}")
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
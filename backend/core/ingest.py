@@ -0,0 +1,229 @@
+import csv
+import io
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from decouple import config
+from fastapi import HTTPException, UploadFile, status
+from pydantic import ValidationError
+from sqlalchemy import and_, func, insert, or_, select, text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from models.catalog_import import CatalogImport as CatalogImportModel, CatalogImportError as CatalogImportErrorModel
+from models.own_service import OwnService as OwnServiceModel
+from models.service import Service as ServiceModel
+from models.service_image import ServiceImage as ServiceImageModel, hash_image_url
+from models.service_rating import ServiceRating as ServiceRatingModel
+from schemas.service import ServiceCreate
+from .geo import geo_cell, parse_geolocation
+from .text import build_search_text
+
+IMPORT_DIR = Path('imports')
+IMPORT_DIR.mkdir(parents=True, exist_ok=True)
+
+IMPORT_BATCH_SIZE = config('IMPORT_BATCH_SIZE', default=1000, cast=int)
+IMPORT_MAX_BYTES = config('IMPORT_MAX_BYTES', default=200 * 1024 * 1024, cast=int)
+IMPORT_CHUNK_SIZE = 1024 * 1024
+IMPORT_STALE_SECONDS = config('IMPORT_STALE_SECONDS', default=config('JOB_LOCK_TIMEOUT', default=600, cast=int), cast=int)
+IMPORT_FORMATS = {'ndjson': 'ndjson', 'jsonl': 'ndjson', 'csv': 'csv'}
+IMAGE_URL_SEPARATOR = '|'
+
+SERVICE_COLUMNS = [
+    'id', 'name', 'address', 'geolocation', 'website', 'type', 'description', 'email', 'phone',
+    'created_at', 'search_text', 'latitude', 'longitude', 'geo_cell', 'favorite_count',
+]
+
+def import_format(filename: str, requested: str = None):
+    extension = requested or (filename or '').rsplit('.', 1)[-1].lower()
+    if extension not in IMPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Import file must be NDJSON or CSV")
+    return IMPORT_FORMATS[extension]
+
+async def save_import_file(file: UploadFile, format: str):
+    file_path = IMPORT_DIR / f"{uuid.uuid4()}.{format}"
+    handle = await run_in_threadpool(file_path.open, 'wb')
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(IMPORT_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > IMPORT_MAX_BYTES:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Import file is too large")
+            await run_in_threadpool(handle.write, chunk)
+    except BaseException:
+        await run_in_threadpool(handle.close)
+        await run_in_threadpool(file_path.unlink, True)
+        raise
+    await run_in_threadpool(handle.close)
+    return file_path
+
+def read_rows(path: str, format: str):
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        if format == 'csv':
+            for row_number, row in enumerate(csv.DictReader(handle), 1):
+                yield row_number, row
+            return
+        for row_number, line in enumerate(handle, 1):
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield row_number, ValueError(f"Invalid JSON: {e}")
+                continue
+            yield row_number, row if isinstance(row, dict) else ValueError("Row must be a JSON object")
+
+def parse_row(raw):
+    if isinstance(raw, Exception):
+        raise raw
+    raw = dict(raw)
+    image_urls = raw.pop('image_urls', None) or []
+    if isinstance(image_urls, str):
+        image_urls = [url.strip() for url in image_urls.split(IMAGE_URL_SEPARATOR) if url.strip()]
+    if not isinstance(image_urls, list) or not all(isinstance(url, str) for url in image_urls):
+        raise ValueError("image_urls must be a list of strings")
+    values = ServiceCreate(**raw).dict()
+    coordinates = parse_geolocation(values['geolocation'])
+    values.update(
+        search_text=build_search_text(values['name'], values['description'], values['address']),
+        latitude=coordinates[0] if coordinates else None,
+        longitude=coordinates[1] if coordinates else None,
+        geo_cell=geo_cell(*coordinates) if coordinates else None,
+        favorite_count=0,
+    )
+    return values, list(dict.fromkeys(image_urls))
+
+def copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def copy_rows(db: Session, table: str, columns, rows):
+    if not rows:
+        return
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(copy_value(row[column]) for column in columns))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+def insert_rows(db: Session, model, columns, rows):
+    if not rows:
+        return
+    if db.get_bind().dialect.name == 'postgresql':
+        copy_rows(db, model.__tablename__, columns, rows)
+    else:
+        db.execute(insert(model), rows)
+
+def insert_services(db: Session, services):
+    if db.get_bind().dialect.name == 'postgresql':
+        ids = db.execute(
+            text("SELECT nextval(pg_get_serial_sequence('service', 'id')) FROM generate_series(1, :count)"),
+            {'count': len(services)}
+        ).scalars().all()
+        now = datetime.utcnow()
+        for service_id, values in zip(ids, services):
+            values.update(id=service_id, created_at=now)
+        copy_rows(db, 'service', SERVICE_COLUMNS, services)
+        return ids
+    return db.execute(
+        insert(ServiceModel).returning(ServiceModel.id, sort_by_parameter_order=True), services
+    ).scalars().all()
+
+def write_batch(db: Session, owner_id: int, batch):
+    if not batch:
+        return []
+    ids = insert_services(db, [values for values, _ in batch])
+    insert_rows(db, OwnServiceModel, ['users_id', 'service_id'], [
+        {'users_id': owner_id, 'service_id': service_id} for service_id in ids
+    ])
+    insert_rows(db, ServiceRatingModel, ['service_id'], [{'service_id': service_id} for service_id in ids])
+    insert_rows(db, ServiceImageModel, ['service_id', 'image_hash', 'image_url'], [
+        {'service_id': service_id, 'image_hash': hash_image_url(url), 'image_url': url}
+        for service_id, (_, image_urls) in zip(ids, batch) for url in image_urls
+    ])
+    return ids
+
+def commit_batch(db: Session, job: CatalogImportModel, batch, errors, last_row_number: int):
+    ids = write_batch(db, job.owner_id, batch)
+    if errors:
+        db.execute(insert(CatalogImportErrorModel), [
+            {'import_id': job.id, 'row_number': row_number, 'error': error} for row_number, error in errors
+        ])
+    job.processed_rows = last_row_number
+    job.inserted_rows += len(ids)
+    job.error_count += len(errors)
+    db.commit()
+
+def format_error(error: Exception):
+    if isinstance(error, ValidationError):
+        return '; '.join(f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors())
+    return str(error)
+
+def create_import(db: Session, owner_id: int, file_path: Path, format: str):
+    job = CatalogImportModel(owner_id=owner_id, file_path=str(file_path), format=format, status='pending')
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def resumable(db: Session):
+    stale_before = db.scalar(select(func.now())) - timedelta(seconds=IMPORT_STALE_SECONDS)
+    return or_(
+        CatalogImportModel.status.in_(('pending', 'failed')),
+        and_(CatalogImportModel.status == 'running', CatalogImportModel.updated_at < stale_before),
+    )
+
+def is_resumable(db: Session, import_id: int):
+    return db.query(CatalogImportModel.id).filter(
+        CatalogImportModel.id == import_id, CatalogImportModel.status != 'pending', resumable(db)
+    ).first() is not None
+
+def run_import(db: Session, import_id: int):
+    claimed = db.query(CatalogImportModel).filter(
+        CatalogImportModel.id == import_id, resumable(db)
+    ).update({'status': 'running', 'last_error': None}, synchronize_session=False)
+    db.commit()
+    job = db.get(CatalogImportModel, import_id)
+    if job is None:
+        raise ValueError(f"Import {import_id} not found")
+    if not claimed:
+        return job
+
+    batch, errors = [], []
+    row_number = job.processed_rows
+    try:
+        for row_number, raw in read_rows(job.file_path, job.format):
+            if row_number <= job.processed_rows:
+                continue
+            try:
+                batch.append(parse_row(raw))
+            except (ValidationError, ValueError, TypeError) as e:
+                errors.append((row_number, format_error(e)))
+            if len(batch) + len(errors) >= IMPORT_BATCH_SIZE:
+                commit_batch(db, job, batch, errors, row_number)
+                batch, errors = [], []
+        commit_batch(db, job, batch, errors, row_number)
+        job.status = 'completed'
+        db.commit()
+        remove_import_file(job)
+    except Exception as e:
+        db.rollback()
+        job = db.get(CatalogImportModel, import_id)
+        job.status = 'failed'
+        job.last_error = str(e)
+        db.commit()
+    return job
+
+def remove_import_file(job: CatalogImportModel):
+    if job.status == 'completed' and os.path.exists(job.file_path):
+        os.remove(job.file_path)
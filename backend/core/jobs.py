@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta
+from decouple import config
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models.job import Job as JobModel
+
+JOB_WORKERS = config('JOB_WORKERS', default=2, cast=int)
+JOB_POLL_INTERVAL = config('JOB_POLL_INTERVAL', default=1.0, cast=float)
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=5, cast=int)
+JOB_LOCK_TIMEOUT = config('JOB_LOCK_TIMEOUT', default=600, cast=int)
+JOB_HEARTBEAT_INTERVAL = JOB_LOCK_TIMEOUT / 3
+JOB_RETENTION_HOURS = config('JOB_RETENTION_HOURS', default=24, cast=int)
+JOB_MAX_BACKOFF = 300
+MAINTENANCE_INTERVAL = 60
+
+handlers = {}
+periodic_kinds = set()
+job_logger = logging.getLogger('tourai.jobs')
+
+def job_handler(kind: str, periodic: bool = False):
+    def register(fn):
+        handlers[kind] = fn
+        if periodic:
+            periodic_kinds.add(kind)
+        return fn
+    return register
+
+def enqueue(db: Session, kind: str, payload=None, delay: float = 0, max_attempts: int = JOB_MAX_ATTEMPTS):
+    job = JobModel(
+        kind=kind,
+        payload=json.dumps(payload or {}),
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+        max_attempts=max_attempts,
+    )
+    db.add(job)
+    db.info['jobs_enqueued'] = True
+    return job
+
+@event.listens_for(Session, 'after_commit')
+def notify_enqueued(session: Session):
+    if session.info.pop('jobs_enqueued', False):
+        job_runner.notify()
+
+@event.listens_for(Session, 'after_rollback')
+def discard_enqueued(session: Session):
+    session.info.pop('jobs_enqueued', None)
+
+def enqueue_unique(db: Session, kind: str, payload=None, delay: float = 0, statuses=('pending',)):
+    exists = db.query(JobModel.id).filter(JobModel.kind == kind, JobModel.status.in_(statuses)).first()
+    if exists is None:
+        return enqueue(db, kind, payload, delay)
+    return None
+
+def backoff_seconds(attempts: int):
+    return min(JOB_MAX_BACKOFF, 2 ** attempts)
+
+def claim_job(db: Session, worker_id: str):
+    now = datetime.utcnow()
+    query = db.query(JobModel.id).filter(
+        JobModel.status == 'pending', JobModel.run_at <= now
+    ).order_by(JobModel.run_at, JobModel.id)
+    if db.get_bind().dialect.name == 'postgresql':
+        query = query.with_for_update(skip_locked=True)
+    row = query.first()
+    if row is None:
+        db.rollback()
+        return None
+    claimed = db.query(JobModel).filter(JobModel.id == row.id, JobModel.status == 'pending').update({
+        'status': 'running',
+        'attempts': JobModel.attempts + 1,
+        'locked_at': now,
+        'locked_by': worker_id,
+    }, synchronize_session=False)
+    db.commit()
+    return db.get(JobModel, row.id) if claimed else None
+
+def refresh_lock(db: Session, job_id: int, worker_id: str):
+    db.query(JobModel).filter(
+        JobModel.id == job_id, JobModel.status == 'running', JobModel.locked_by == worker_id
+    ).update({'locked_at': datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+def finish_job(db: Session, job_id: int):
+    db.query(JobModel).filter(JobModel.id == job_id).update({
+        'status': 'done', 'locked_at': None, 'locked_by': None, 'last_error': None,
+    }, synchronize_session=False)
+    db.commit()
+
+def fail_job(db: Session, job_id: int, error: str):
+    db.rollback()
+    job = db.get(JobModel, job_id)
+    if job.attempts >= job.max_attempts:
+        job.status = 'failed'
+    else:
+        job.status = 'pending'
+        job.run_at = datetime.utcnow() + timedelta(seconds=backoff_seconds(job.attempts))
+    job.locked_at = None
+    job.locked_by = None
+    job.last_error = error[-4000:]
+    db.commit()
+    return job.status
+
+def requeue_stale_jobs(db: Session):
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_LOCK_TIMEOUT)
+    requeued = db.query(JobModel).filter(JobModel.status == 'running', JobModel.locked_at < cutoff).update({
+        'status': 'pending', 'locked_at': None, 'locked_by': None, 'run_at': datetime.utcnow(),
+    }, synchronize_session=False)
+    removed = db.query(JobModel).filter(
+        JobModel.status == 'done', JobModel.updated_at < datetime.utcnow() - timedelta(hours=JOB_RETENTION_HOURS)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return requeued, removed
+
+def schedule_periodic_jobs(db: Session):
+    for kind in sorted(periodic_kinds):
+        enqueue_unique(db, kind, statuses=('pending', 'running'))
+    db.commit()
+
+class JobRunner:
+    def __init__(self, workers: int, poll_interval: float):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.session_factory = None
+        self.loop = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._last_maintenance = 0.0
+
+    def start(self, session_factory, loop=None):
+        if self._threads or self.workers <= 0:
+            return
+        self.session_factory = session_factory
+        self.loop = loop
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self.work, args=(f'{socket.gethostname()}:{os.getpid()}:{index}',), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        self._wake.set()
+
+    def call_async(self, coroutine_fn, *args):
+        if self.loop is None or self.loop.is_closed():
+            return asyncio.run(coroutine_fn(*args))
+        return asyncio.run_coroutine_threadsafe(coroutine_fn(*args), self.loop).result()
+
+    def maintain(self, db: Session):
+        now = datetime.utcnow().timestamp()
+        if now - self._last_maintenance < MAINTENANCE_INTERVAL:
+            return
+        self._last_maintenance = now
+        requeued, removed = requeue_stale_jobs(db)
+        if requeued:
+            job_logger.warning(f"Requeued {requeued} jobs whose worker stopped responding")
+        schedule_periodic_jobs(db)
+
+    def heartbeat(self, job_id: int, worker_id: str, done: threading.Event):
+        while not done.wait(JOB_HEARTBEAT_INTERVAL):
+            db = self.session_factory()
+            try:
+                refresh_lock(db, job_id, worker_id)
+            except Exception as e:
+                job_logger.error(f"Heartbeat for job {job_id} failed: {e}")
+            finally:
+                db.close()
+
+    def run_one(self, db: Session, worker_id: str):
+        job = claim_job(db, worker_id)
+        if job is None:
+            return False
+        handler = handlers.get(job.kind)
+        done = threading.Event()
+        beat = threading.Thread(target=self.heartbeat, args=(job.id, worker_id, done), daemon=True)
+        beat.start()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job.kind}'")
+            handler(db, json.loads(job.payload))
+            finish_job(db, job.id)
+        except Exception:
+            status = fail_job(db, job.id, traceback.format_exc())
+            job_logger.error(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}; now {status}")
+        finally:
+            done.set()
+            beat.join()
+        return True
+
+    def work(self, worker_id: str):
+        while not self._stop.is_set():
+            db = self.session_factory()
+            try:
+                self.maintain(db)
+                while not self._stop.is_set() and self.run_one(db, worker_id):
+                    db.expunge_all()
+            except Exception as e:
+                job_logger.error(f"Job worker {worker_id} error: {e}")
+                db.rollback()
+            finally:
+                db.close()
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+job_runner = JobRunner(JOB_WORKERS, JOB_POLL_INTERVAL)
@@ -0,0 +1,128 @@
+import logging
+import time
+from contextvars import ContextVar
+from decouple import config
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, Histogram, generate_latest
+
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=0, cast=float)
+SLOW_REQUEST_MAX_STATEMENTS = config('SLOW_REQUEST_MAX_STATEMENTS', default=50, cast=int)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+UNMATCHED_ROUTE = 'unmatched'
+
+slow_request_logger = logging.getLogger('tourai.slow_requests')
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    ['method', 'route', 'status'],
+)
+REQUEST_STATEMENTS = Histogram(
+    'http_request_sql_statements', 'SQL statements executed per request',
+    ['method', 'route'], buckets=STATEMENT_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_seconds', 'Time spent executing SQL per request',
+    ['method', 'route'],
+)
+REQUEST_POOL_WAIT = Histogram(
+    'http_request_pool_wait_seconds', 'Time spent waiting for pooled connections per request',
+    ['method', 'route'],
+)
+POOL_WAIT = Histogram(
+    'db_pool_checkout_seconds', 'Time to check a connection out of the pool',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10),
+)
+POOL_CONNECTIONS = Gauge(
+    'db_pool_connections', 'Connections held by each engine pool',
+    ['pool', 'state'],
+)
+
+class RequestMetrics:
+    __slots__ = ('statements', 'db_time', 'pool_wait', 'captured')
+
+    def __init__(self, capture: bool):
+        self.statements = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.captured = [] if capture else None
+
+current_request = ContextVar('current_request_metrics', default=None)
+
+def record_statement(statement: str, elapsed: float):
+    metrics = current_request.get()
+    if metrics is None:
+        return
+    metrics.statements += 1
+    metrics.db_time += elapsed
+    if metrics.captured is not None and len(metrics.captured) < SLOW_REQUEST_MAX_STATEMENTS:
+        metrics.captured.append((round(elapsed * 1000, 2), ' '.join(statement.split())))
+
+def record_pool_wait(elapsed: float):
+    POOL_WAIT.observe(elapsed)
+    metrics = current_request.get()
+    if metrics is not None:
+        metrics.pool_wait += elapsed
+
+class TimedCheckout:
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            record_pool_wait(time.perf_counter() - started)
+
+def route_label(scope):
+    route = scope.get('route')
+    return getattr(route, 'path', None) or UNMATCHED_ROUTE
+
+def log_slow_request(method: str, path: str, status_code: int, elapsed: float, metrics: RequestMetrics):
+    lines = [
+        f"{method} {path} -> {status_code} took {elapsed * 1000:.1f} ms "
+        f"(sql: {metrics.statements} statements, {metrics.db_time * 1000:.1f} ms; pool wait {metrics.pool_wait * 1000:.1f} ms)"
+    ]
+    lines.extend(f"  [{duration} ms] {statement}" for duration, statement in metrics.captured)
+    if metrics.statements > len(metrics.captured):
+        lines.append(f"  ... {metrics.statements - len(metrics.captured)} more statements")
+    slow_request_logger.warning('\n'.join(lines))
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics(capture=SLOW_REQUEST_MS > 0)
+        token = current_request.set(metrics)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            method, route = scope['method'], route_label(scope)
+            REQUEST_LATENCY.labels(method, route, str(status_code)).observe(elapsed)
+            REQUEST_STATEMENTS.labels(method, route).observe(metrics.statements)
+            REQUEST_DB_TIME.labels(method, route).observe(metrics.db_time)
+            REQUEST_POOL_WAIT.labels(method, route).observe(metrics.pool_wait)
+            if SLOW_REQUEST_MS > 0 and elapsed * 1000 >= SLOW_REQUEST_MS:
+                log_slow_request(method, scope['path'], status_code, elapsed, metrics)
+
+def update_pool_gauges(statistics):
+    for name, stats in statistics.items():
+        for state in ('size', 'checkedin', 'checkedout', 'overflow'):
+            if state in stats:
+                POOL_CONNECTIONS.labels(name, state).set(stats[state])
+
+def render_metrics(statistics):
+    update_pool_gauges(statistics)
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,66 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from models.service import Service as ServiceModel
+from .geo import bounding_box, cells_in_box, geo_cell, haversine_km, parse_geolocation, ring_cells, ring_coverage_km
+
+MAX_RADIUS_CELLS = 2500
+MAX_RINGS = 20
+BACKFILL_BATCH_SIZE = 1000
+
+def probe(db: Session, cells, type: Optional[str]):
+    query = db.query(ServiceModel).filter(ServiceModel.geo_cell.in_(cells))
+    if type and type != "all":
+        query = query.filter(ServiceModel.type == type)
+    return query.all()
+
+def with_distance(services, lat: float, lon: float):
+    return [(haversine_km(lat, lon, service.latitude, service.longitude), service) for service in services]
+
+def services_within(db: Session, lat: float, lon: float, radius_km: float, type: Optional[str] = None):
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    cells = cells_in_box(min_lat, max_lat, min_lon, max_lon)
+    if len(cells) > MAX_RADIUS_CELLS:
+        raise ValueError("Search radius is too large")
+    candidates = with_distance(probe(db, cells, type), lat, lon)
+    results = [candidate for candidate in candidates if candidate[0] <= radius_km]
+    results.sort(key=lambda candidate: (candidate[0], candidate[1].id))
+    return results
+
+def nearest_services(db: Session, lat: float, lon: float, k: int, max_radius_km: float, type: Optional[str] = None):
+    found = []
+    for ring in range(MAX_RINGS + 1):
+        found.extend(with_distance(probe(db, ring_cells(lat, lon, ring), type), lat, lon))
+        covered_km = ring_coverage_km(lat, ring)
+        within = sorted(
+            (candidate for candidate in found if candidate[0] <= max_radius_km),
+            key=lambda candidate: (candidate[0], candidate[1].id),
+        )
+        if len(within) >= k and within[k - 1][0] <= covered_km:
+            return within[:k]
+        if covered_km >= max_radius_km:
+            break
+    return within[:k]
+
+def backfill_coordinates(db: Session, batch_size: int = BACKFILL_BATCH_SIZE):
+    last_id = 0
+    while True:
+        rows = db.query(ServiceModel.id, ServiceModel.geolocation).filter(
+            ServiceModel.id > last_id
+        ).order_by(ServiceModel.id).limit(batch_size).all()
+        if not rows:
+            return
+        mappings = []
+        parsed = 0
+        for row in rows:
+            coordinates = parse_geolocation(row.geolocation)
+            if coordinates:
+                parsed += 1
+            mappings.append({
+                'id': row.id,
+                'latitude': coordinates[0] if coordinates else None,
+                'longitude': coordinates[1] if coordinates else None,
+                'geo_cell': geo_cell(*coordinates) if coordinates else None,
+            })
+        db.bulk_update_mappings(ServiceModel, mappings)
+        last_id = rows[-1].id
+        yield parsed, len(rows) - parsed
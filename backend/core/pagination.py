@@ -0,0 +1,94 @@
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+def encode_cursor(values):
+    encoded = []
+    for value in values:
+        if isinstance(value, datetime):
+            encoded.append(['dt', value.isoformat()])
+        else:
+            encoded.append(['v', value])
+    raw = json.dumps(encoded, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str, size: int):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        encoded = json.loads(raw)
+        values = [datetime.fromisoformat(value) if kind == 'dt' else value for kind, value in encoded]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+def is_nullable(column):
+    return getattr(getattr(column, 'expression', column), 'nullable', True)
+
+def equal_to(column, value):
+    return column.is_(None) if value is None else column == value
+
+def keyset_filter(ordering, values):
+    clauses = []
+    for index, (column, descending) in enumerate(ordering):
+        value = values[index]
+        if value is None:
+            continue
+        equal = [equal_to(ordering[i][0], values[i]) for i in range(index)]
+        after = column < value if descending else column > value
+        if is_nullable(column):
+            after = or_(and_(column.is_not(None), after), column.is_(None))
+        clauses.append(and_(*equal, after))
+    return or_(*clauses)
+
+def order_clauses(ordering):
+    clauses = []
+    for column, descending in ordering:
+        clause = column.desc() if descending else column.asc()
+        clauses.append(clause.nulls_last() if is_nullable(column) else clause)
+    return clauses
+
+def paginate(query, ordering, limit: int, cursor=None, offset: int = 0):
+    keys = [f'cursor_{index}' for index in range(len(ordering))]
+    query = query.add_columns(*[column.label(key) for (column, _), key in zip(ordering, keys)])
+    if cursor:
+        query = query.filter(keyset_filter(ordering, decode_cursor(cursor, len(ordering))))
+    elif offset:
+        query = query.offset(offset)
+    rows = query.order_by(*order_clauses(ordering)).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], key) for key in keys])
+    return rows, next_cursor
+
+class CountCache:
+    def __init__(self, ttl: float = 60.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                return entry[0]
+        value = compute()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (value, now + self.ttl)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decouple import config
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+PASSWORD_HASH_ROUNDS = config('PASSWORD_HASH_ROUNDS', default=12, cast=int)
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=4, cast=int)
+PASSWORD_HASH_QUEUE_LIMIT = config('PASSWORD_HASH_QUEUE_LIMIT', default=32, cast=int)
+PASSWORD_HASH_RETRY_AFTER = config('PASSWORD_HASH_RETRY_AFTER', default=1, cast=int)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=PASSWORD_HASH_ROUNDS)
+
+class PasswordHasher:
+    def __init__(self, workers: int, queue_limit: int):
+        self.capacity = workers + queue_limit
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def admit(self):
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service is busy, please retry",
+                    headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)},
+                )
+            self.in_flight += 1
+
+    def release(self, _future=None):
+        with self._lock:
+            self.in_flight -= 1
+
+    def submit(self, fn, *args):
+        self.admit()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self.release()
+            raise
+        future.add_done_callback(self.release)
+        return future
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": self.in_flight, "capacity": self.capacity, "rejected": self.rejected}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT)
+
+async def hash_password(password: str):
+    return await hasher.run(pwd_context.hash, password)
+
+async def verify_password(password: str, hashed: str):
+    return await hasher.run(pwd_context.verify_and_update, password, hashed)
+
+def hash_password_sync(password: str):
+    return hasher.submit(pwd_context.hash, password).result()
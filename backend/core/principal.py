@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+from decouple import config
+
+PRINCIPAL_CACHE_TTL = config('PRINCIPAL_CACHE_TTL', default=300, cast=float)
+PRINCIPAL_CACHE_SIZE = config('PRINCIPAL_CACHE_SIZE', default=10000, cast=int)
+
+class Principal:
+    __slots__ = ('kind', 'id', 'user_name', 'role', 'full_name')
+
+    def __init__(self, kind: str, id: int, user_name: str, role: str, full_name: str = None):
+        self.kind = kind
+        self.id = id
+        self.user_name = user_name
+        self.role = role
+        self.full_name = full_name
+
+    @classmethod
+    def from_user(cls, user):
+        return cls('user', user.id, user.user_name, user.role, user.full_name)
+
+    @classmethod
+    def from_admin(cls, admin):
+        return cls('admin', admin.id, admin.user_name, 'admin')
+
+class PrincipalCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tokens_by_principal = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= now:
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+            return principal
+
+    def put(self, token: str, principal: Principal, token_exp: float):
+        expires_at = min(time.time() + self.ttl, token_exp)
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (principal, expires_at)
+            self._tokens_by_principal.setdefault((principal.kind, principal.id), set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, kind: str, record_id: int):
+        with self._lock:
+            for token in list(self._tokens_by_principal.get((kind, record_id), ())):
+                self._remove(token)
+
+    def discard(self, token: str):
+        with self._lock:
+            self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_principal.clear()
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        key = (entry[0].kind, entry[0].id)
+        tokens = self._tokens_by_principal.get(key)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_principal[key]
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_TTL, PRINCIPAL_CACHE_SIZE)
@@ -0,0 +1,74 @@
+from typing import List, Optional
+from sqlalchemy import case, func, insert, select
+from sqlalchemy.orm import Session
+from models.comment import Comment as CommentModel
+from models.service import Service as ServiceModel
+from models.service_rating import ServiceRating as ServiceRatingModel
+
+RATING_VALUES = range(1, 6)
+
+def histogram_column(rating: int):
+    return getattr(ServiceRatingModel, f'rating_{rating}')
+
+def apply_rating(db: Session, service_id: int, rating: Optional[int], delta: int = 1):
+    if rating is None:
+        return
+    values = {
+        'rating_count': ServiceRatingModel.rating_count + delta,
+        'rating_sum': ServiceRatingModel.rating_sum + rating * delta,
+        'average_rating': case(
+            (ServiceRatingModel.rating_count + delta > 0,
+             (ServiceRatingModel.rating_sum + rating * delta) * 1.0 / (ServiceRatingModel.rating_count + delta)),
+            else_=None,
+        ),
+    }
+    if rating in RATING_VALUES:
+        values[f'rating_{rating}'] = histogram_column(rating) + delta
+    updated = db.query(ServiceRatingModel).filter(
+        ServiceRatingModel.service_id == service_id
+    ).update(values, synchronize_session=False)
+    if not updated:
+        rebuild_ratings(db, [service_id])
+
+def aggregate_select(service_ids: Optional[List[int]] = None):
+    rating = CommentModel.rating
+    columns = [
+        ServiceModel.id,
+        func.count(rating),
+        func.coalesce(func.sum(rating), 0),
+        func.avg(rating),
+    ] + [func.coalesce(func.sum(case((rating == value, 1), else_=0)), 0) for value in RATING_VALUES]
+    query = select(*columns).select_from(ServiceModel).outerjoin(
+        CommentModel, CommentModel.service_id == ServiceModel.id
+    ).group_by(ServiceModel.id)
+    if service_ids is not None:
+        query = query.where(ServiceModel.id.in_(service_ids))
+    return query
+
+def rebuild_ratings(db: Session, service_ids: Optional[List[int]] = None):
+    delete_query = db.query(ServiceRatingModel)
+    if service_ids is not None:
+        delete_query = delete_query.filter(ServiceRatingModel.service_id.in_(service_ids))
+    delete_query.delete(synchronize_session=False)
+    target_columns = ['service_id', 'rating_count', 'rating_sum', 'average_rating'] + [
+        f'rating_{value}' for value in RATING_VALUES
+    ]
+    db.execute(insert(ServiceRatingModel).from_select(target_columns, aggregate_select(service_ids)))
+
+def fetch_ratings(db: Session, service_ids: List[int]):
+    ratings = {}
+    if not service_ids:
+        return ratings
+    rows = db.query(ServiceRatingModel).filter(ServiceRatingModel.service_id.in_(service_ids)).all()
+    for row in rows:
+        ratings[row.service_id] = row
+    return ratings
+
+def rating_payload(row: Optional[ServiceRatingModel]):
+    if row is None:
+        return {'average_rating': None, 'rating_count': 0, 'rating_histogram': [0] * len(RATING_VALUES)}
+    return {
+        'average_rating': row.average_rating,
+        'rating_count': row.rating_count,
+        'rating_histogram': [getattr(row, f'rating_{value}') for value in RATING_VALUES],
+    }
@@ -0,0 +1,90 @@
+import threading
+import time
+import numpy as np
+from decouple import config
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.recommendation import ServiceSimilarity as ServiceSimilarityModel, UserRecommendation as UserRecommendationModel
+from models.service import Service as ServiceModel
+
+RECOMMENDATION_RELOAD_SECONDS = config('RECOMMENDATION_RELOAD_SECONDS', default=600, cast=float)
+POPULAR_LIMIT = 100
+LOAD_BATCH_SIZE = 100_000
+
+class TopKTable:
+    def __init__(self, keys, values, scores):
+        self.values = values
+        self.scores = scores
+        boundaries = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, dtype=np.int64)
+        ends = np.r_[boundaries[1:], len(keys)]
+        self.positions = dict(zip(keys[boundaries].tolist(), zip(boundaries.tolist(), ends.tolist())))
+
+    @classmethod
+    def load(cls, db: Session, key_column, value_column, score_column, rank_column):
+        statement = select(key_column, value_column, score_column).order_by(key_column, rank_column)
+        keys, values, scores = [], [], []
+        for partition in db.execute(statement.execution_options(yield_per=LOAD_BATCH_SIZE)).partitions():
+            key_chunk, value_chunk, score_chunk = zip(*partition)
+            keys.append(np.array(key_chunk, dtype=np.int64))
+            values.append(np.array(value_chunk, dtype=np.int32))
+            scores.append(np.array(score_chunk, dtype=np.float32))
+        if not keys:
+            return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+        return cls(np.concatenate(keys), np.concatenate(values), np.concatenate(scores))
+
+    def get(self, key: int, limit: int):
+        position = self.positions.get(key)
+        if position is None:
+            return []
+        start, end = position
+        end = min(end, start + limit)
+        return list(zip(self.values[start:end].tolist(), self.scores[start:end].tolist()))
+
+    def __len__(self):
+        return len(self.positions)
+
+class RecommendationStore:
+    def __init__(self, reload_seconds: float):
+        self.reload_seconds = reload_seconds
+        self.similar = None
+        self.recommended = None
+        self.popular = []
+        self.loaded_at = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session):
+        similar = TopKTable.load(
+            db, ServiceSimilarityModel.service_id, ServiceSimilarityModel.similar_service_id,
+            ServiceSimilarityModel.score, ServiceSimilarityModel.rank,
+        )
+        recommended = TopKTable.load(
+            db, UserRecommendationModel.users_id, UserRecommendationModel.service_id,
+            UserRecommendationModel.score, UserRecommendationModel.rank,
+        )
+        popular = [service_id for (service_id,) in db.query(ServiceModel.id).order_by(
+            ServiceModel.favorite_count.desc(), ServiceModel.id.desc()
+        ).limit(POPULAR_LIMIT).all()]
+        self.similar, self.recommended, self.popular = similar, recommended, popular
+        self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session):
+        if self.loaded_at is None:
+            with self._lock:
+                if self.loaded_at is None:
+                    self.load(db)
+        elif time.monotonic() - self.loaded_at > self.reload_seconds and self._lock.acquire(blocking=False):
+            try:
+                self.load(db)
+            finally:
+                self._lock.release()
+
+    def similar_to(self, service_id: int, limit: int):
+        return self.similar.get(service_id, limit)
+
+    def recommended_for(self, user_id: int, limit: int):
+        recommendations = self.recommended.get(user_id, limit)
+        if recommendations:
+            return recommendations
+        return [(service_id, None) for service_id in self.popular[:limit]]
+
+recommendation_store = RecommendationStore(RECOMMENDATION_RELOAD_SECONDS)
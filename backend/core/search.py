@@ -0,0 +1,96 @@
+from sqlalchemy import Float, Integer, func, inspect, literal, or_, text
+from sqlalchemy.orm import Session
+from models.service import Service as ServiceModel
+from .text import build_search_text, search_tokens
+
+SEARCH_BATCH_SIZE = 1000
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS service_fts USING fts5("
+    "search_text, content='service', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS service_fts_ai AFTER INSERT ON service BEGIN "
+    "INSERT INTO service_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS service_fts_ad AFTER DELETE ON service BEGIN "
+    "INSERT INTO service_fts(service_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS service_fts_au AFTER UPDATE OF search_text ON service BEGIN "
+    "INSERT INTO service_fts(service_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO service_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "INSERT INTO service_fts(service_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_service_search_tsv ON service USING GIN (to_tsvector('simple', coalesce(search_text, '')))",
+    "CREATE INDEX IF NOT EXISTS ix_service_search_trgm ON service USING GIN (search_text gin_trgm_ops)",
+]
+
+_backends = {}
+
+def search_backend(db: Session):
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _backends:
+        dialect = bind.dialect.name
+        backend = 'like'
+        if dialect == 'postgresql':
+            has_trgm = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+            backend = 'postgres_trgm' if has_trgm else 'postgres'
+        elif dialect == 'sqlite' and inspect(db.connection()).has_table('service_fts'):
+            backend = 'fts5'
+        _backends[key] = backend
+    return _backends[key]
+
+def service_tsvector():
+    return func.to_tsvector('simple', func.coalesce(ServiceModel.search_text, ''))
+
+def apply_search(query, db: Session, term: str):
+    tokens = search_tokens(term)
+    if not tokens:
+        return query, None
+    backend = search_backend(db)
+
+    if backend.startswith('postgres'):
+        tsquery = func.to_tsquery('simple', ' & '.join(f'{token}:*' for token in tokens))
+        match = service_tsvector().op('@@')(tsquery)
+        rank = func.ts_rank(service_tsvector(), tsquery)
+        if backend == 'postgres_trgm':
+            folded = ' '.join(tokens)
+            match = or_(match, ServiceModel.search_text.ilike(f'%{folded}%'))
+            rank = rank + func.similarity(ServiceModel.search_text, folded)
+        return query.filter(match), rank
+
+    if backend == 'fts5':
+        fts = text(
+            "SELECT rowid AS service_id, -bm25(service_fts) AS score FROM service_fts WHERE service_fts MATCH :match"
+        ).bindparams(match=' '.join(f'"{token}"*' for token in tokens)).columns(
+            service_id=Integer(), score=Float()
+        ).subquery('service_fts_match')
+        query = query.join(fts, fts.c.service_id == ServiceModel.id)
+        return query, fts.c.score
+
+    for token in tokens:
+        query = query.filter(ServiceModel.search_text.like(f'%{token}%'))
+    return query, literal(0)
+
+def ensure_search_index(db: Session):
+    dialect = db.get_bind().dialect.name
+    statements = POSTGRES_DDL if dialect == 'postgresql' else SQLITE_DDL if dialect == 'sqlite' else []
+    for statement in statements:
+        db.execute(text(statement))
+    _backends.clear()
+
+def backfill_search_text(db: Session):
+    last_id = 0
+    updated = 0
+    while True:
+        rows = db.query(
+            ServiceModel.id, ServiceModel.name, ServiceModel.description, ServiceModel.address
+        ).filter(ServiceModel.id > last_id).order_by(ServiceModel.id).limit(SEARCH_BATCH_SIZE).all()
+        if not rows:
+            return updated
+        db.bulk_update_mappings(ServiceModel, [
+            {'id': row.id, 'search_text': build_search_text(row.name, row.description, row.address)}
+            for row in rows
+        ])
+        updated += len(rows)
+        last_id = rows[-1].id
@@ -0,0 +1,18 @@
+from decimal import Decimal
+import orjson
+from fastapi.responses import JSONResponse
+
+def encode_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(data):
+    return orjson.dumps(data, default=encode_default).decode('utf-8')
+
+def rows_to_dicts(rows, keys):
+    return [dict(zip(keys, row)) for row in rows]
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content):
+        return orjson.dumps(content, default=encode_default)
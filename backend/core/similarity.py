@@ -0,0 +1,169 @@
+import numpy as np
+from decouple import config
+from scipy import sparse
+from scipy.spatial import cKDTree
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.comment import Comment as CommentModel
+from models.favorite import Favorite as FavoriteModel
+from models.recommendation import ServiceSimilarity as ServiceSimilarityModel, UserRecommendation as UserRecommendationModel
+from models.service import Service as ServiceModel
+from .geo import EARTH_RADIUS_KM
+from .ingest import insert_rows
+
+SIMILARITY_TOP_K = config('SIMILARITY_TOP_K', default=20, cast=int)
+SIMILARITY_BLOCK_SIZE = config('SIMILARITY_BLOCK_SIZE', default=2000, cast=int)
+SIMILARITY_WEIGHTS = {
+    'collaborative': config('SIMILARITY_WEIGHT_COLLABORATIVE', default=1.0, cast=float),
+    'type': config('SIMILARITY_WEIGHT_TYPE', default=0.15, cast=float),
+    'distance': config('SIMILARITY_WEIGHT_DISTANCE', default=0.35, cast=float),
+}
+GEO_NEIGHBORS = config('SIMILARITY_GEO_NEIGHBORS', default=50, cast=int)
+GEO_SCALE_KM = config('SIMILARITY_GEO_SCALE_KM', default=5.0, cast=float)
+FAVORITE_WEIGHT = 1.0
+UNRATED_COMMENT_WEIGHT = 0.3
+READ_BATCH_SIZE = 100_000
+WRITE_BATCH_SIZE = 10_000
+
+def column_arrays(db: Session, statement, dtypes):
+    chunks = [[] for _ in dtypes]
+    for partition in db.execute(statement.execution_options(yield_per=READ_BATCH_SIZE)).partitions():
+        for position, values in enumerate(zip(*partition)):
+            chunks[position].append(np.array(values, dtype=dtypes[position]))
+    return [np.concatenate(chunk) if chunk else np.empty(0, dtype=dtype) for chunk, dtype in zip(chunks, dtypes)]
+
+def load_items(db: Session):
+    service_ids, types, latitudes, longitudes = column_arrays(
+        db,
+        select(ServiceModel.id, ServiceModel.type, ServiceModel.latitude, ServiceModel.longitude).order_by(ServiceModel.id),
+        [np.int64, object, np.float64, np.float64],
+    )
+    type_codes = {name: code for code, name in enumerate(sorted({value for value in types if value}))}
+    codes = np.fromiter((type_codes.get(value, -1) for value in types), dtype=np.int32, count=len(types))
+    return service_ids, codes, latitudes, longitudes
+
+def rating_weight(ratings):
+    weights = np.clip((ratings - 2.0) / 3.0, 0.0, 1.0)
+    return np.where(np.isnan(ratings), UNRATED_COMMENT_WEIGHT, weights)
+
+def load_interactions(db: Session, service_ids):
+    favorite_users, favorite_services = column_arrays(
+        db, select(FavoriteModel.users_id, FavoriteModel.service_id), [np.int64, np.int64]
+    )
+    comment_users, comment_services, ratings = column_arrays(
+        db, select(CommentModel.users_id, CommentModel.service_id, CommentModel.rating), [np.int64, np.int64, np.float64]
+    )
+    users = np.concatenate([favorite_users, comment_users])
+    services = np.concatenate([favorite_services, comment_services])
+    weights = np.concatenate([np.full(len(favorite_users), FAVORITE_WEIGHT), rating_weight(ratings)])
+
+    if len(service_ids) == 0:
+        return np.empty(0, dtype=np.int64), sparse.csr_matrix((0, 0))
+    columns = np.minimum(np.searchsorted(service_ids, services), len(service_ids) - 1)
+    known = service_ids[columns] == services
+    user_ids, rows = np.unique(users[known], return_inverse=True)
+    return user_ids, sparse.csr_matrix(
+        (weights[known], (rows, columns[known])), shape=(len(user_ids), len(service_ids))
+    )
+
+def normalize_columns(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    return (matrix @ sparse.diags(inverse)).tocsr()
+
+def geo_neighbors(latitudes, longitudes):
+    count = len(latitudes)
+    located = np.flatnonzero(~np.isnan(latitudes) & ~np.isnan(longitudes))
+    if len(located) < 2:
+        return sparse.csr_matrix((count, count))
+    lat, lon = np.radians(latitudes[located]), np.radians(longitudes[located])
+    points = np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+    k = min(GEO_NEIGHBORS + 1, len(located))
+    distances, neighbors = cKDTree(points).query(points, k=k)
+    rows = np.repeat(located, k)
+    columns = located[neighbors.ravel()]
+    weights = np.exp(-(distances.ravel() * EARTH_RADIUS_KM) / GEO_SCALE_KM)
+    keep = (rows != columns) & (weights > 1e-3)
+    return sparse.csr_matrix((weights[keep], (rows[keep], columns[keep])), shape=(count, count))
+
+def top_k_per_row(rows, columns, scores, k: int):
+    if len(rows) == 0:
+        return rows, np.empty(0, dtype=np.int64), columns, scores
+    order = np.lexsort((-scores, rows))
+    rows, columns, scores = rows[order], columns[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    lengths = np.diff(np.r_[starts, len(rows)])
+    ranks = np.arange(len(rows)) - np.repeat(starts, lengths)
+    keep = ranks < k
+    return rows[keep], ranks[keep], columns[keep], scores[keep]
+
+def similarity_blocks(interactions, type_codes, geo, k: int):
+    normalized = normalize_columns(interactions)
+    transposed = normalized.T.tocsr()
+    weights = SIMILARITY_WEIGHTS
+    count = transposed.shape[0]
+    for start in range(0, count, SIMILARITY_BLOCK_SIZE):
+        stop = min(start + SIMILARITY_BLOCK_SIZE, count)
+        combined = (weights['collaborative'] * (transposed[start:stop] @ normalized) + weights['distance'] * geo[start:stop]).tocoo()
+        rows = combined.row.astype(np.int64) + start
+        columns = combined.col.astype(np.int64)
+        same_type = (type_codes[rows] == type_codes[columns]) & (type_codes[rows] >= 0)
+        scores = combined.data + weights['type'] * same_type
+        keep = (rows != columns) & (scores > 0)
+        yield top_k_per_row(rows[keep], columns[keep], scores[keep], k)
+
+def build_similarity(interactions, type_codes, geo, k: int):
+    parts = list(similarity_blocks(interactions, type_codes, geo, k))
+    if not parts:
+        return [np.empty(0, dtype=np.int64)] * 3 + [np.empty(0)]
+    return [np.concatenate(values) for values in zip(*parts)]
+
+def build_recommendations(interactions, similarity, k: int):
+    parts = []
+    for start in range(0, interactions.shape[0], SIMILARITY_BLOCK_SIZE):
+        block = interactions[start:start + SIMILARITY_BLOCK_SIZE]
+        scores = (block @ similarity).tocsr()
+        seen = block.copy()
+        seen.data = np.ones_like(seen.data)
+        scores = (scores - scores.multiply(seen)).tocoo()
+        keep = scores.data > 0
+        rows, ranks, columns, values = top_k_per_row(
+            scores.row[keep].astype(np.int64) + start, scores.col[keep].astype(np.int64), scores.data[keep], k
+        )
+        parts.append((rows, ranks, columns, values))
+    if not parts:
+        return [np.empty(0, dtype=np.int64)] * 3 + [np.empty(0)]
+    return [np.concatenate(values) for values in zip(*parts)]
+
+def write_top_k(db: Session, model, key_column: str, value_column: str, keys, ranks, values, scores):
+    db.query(model).delete(synchronize_session=False)
+    columns = [key_column, 'rank', value_column, 'score']
+    for start in range(0, len(keys), WRITE_BATCH_SIZE):
+        stop = start + WRITE_BATCH_SIZE
+        insert_rows(db, model, columns, [
+            dict(zip(columns, row)) for row in zip(
+                keys[start:stop].tolist(), ranks[start:stop].tolist(),
+                values[start:stop].tolist(), np.round(scores[start:stop], 6).tolist(),
+            )
+        ])
+
+def rebuild_recommendations(db: Session, k: int = SIMILARITY_TOP_K):
+    service_ids, type_codes, latitudes, longitudes = load_items(db)
+    user_ids, interactions = load_interactions(db, service_ids)
+    geo = geo_neighbors(latitudes, longitudes)
+
+    rows, ranks, columns, scores = build_similarity(interactions, type_codes, geo, k)
+    similarity = sparse.csr_matrix((scores, (rows, columns)), shape=(len(service_ids), len(service_ids)))
+    user_rows, user_ranks, user_columns, user_scores = build_recommendations(interactions, similarity, k)
+
+    write_top_k(db, ServiceSimilarityModel, 'service_id', 'similar_service_id',
+                service_ids[rows], ranks, service_ids[columns], scores)
+    write_top_k(db, UserRecommendationModel, 'users_id', 'service_id',
+                user_ids[user_rows], user_ranks, service_ids[user_columns], user_scores)
+    return {
+        "services": len(service_ids),
+        "users": len(user_ids),
+        "interactions": int(interactions.nnz),
+        "similarity_rows": len(rows),
+        "recommendation_rows": len(user_rows),
+    }
@@ -0,0 +1,42 @@
+from decouple import config
+from fastapi.responses import StreamingResponse
+
+STREAM_BATCH_SIZE = config('STREAM_BATCH_SIZE', default=500, cast=int)
+STREAM_CHUNK_BYTES = 64 * 1024
+STREAM_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+def session_stream(session_factory, produce, *args):
+    db = session_factory()
+    try:
+        yield from produce(db, *args)
+    finally:
+        db.close()
+
+def encode_stream(documents, format: str):
+    buffer = []
+    size = 0
+    if format == 'json':
+        buffer.append('[')
+    first = True
+    for document in documents:
+        if format == 'json':
+            piece = document if first else ',' + document
+        else:
+            piece = document + '\n'
+        first = False
+        buffer.append(piece)
+        size += len(piece)
+        if size >= STREAM_CHUNK_BYTES:
+            yield ''.join(buffer).encode('utf-8')
+            buffer, size = [], 0
+    if format == 'json':
+        buffer.append(']')
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+def streaming_response(session_factory, produce, *args, format: str = 'ndjson'):
+    documents = session_stream(session_factory, produce, *args)
+    return StreamingResponse(encode_stream(documents, format), media_type=STREAM_MEDIA_TYPES[format])
@@ -0,0 +1,113 @@
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from decouple import config
+from sqlalchemy.orm import Session
+from models.service_image import ServiceImage as ServiceImageModel
+from .analytics import service_owner_ids
+from .cache import business_tags, comment_tags, response_cache
+from .images import UPLOAD_DIR, image_references, remove_image_files, schedule_variants
+from .jobs import enqueue, enqueue_unique, job_handler, job_runner
+from .ratings import rebuild_ratings
+
+IMAGE_GC_BATCH_SIZE = config('IMAGE_GC_BATCH_SIZE', default=500, cast=int)
+IMAGE_GC_MIN_AGE = config('IMAGE_GC_MIN_AGE', default=3600, cast=int)
+IMAGE_GC_INTERVAL = config('IMAGE_GC_INTERVAL', default=6 * 3600, cast=int)
+IMAGE_GC_BATCH_DELAY = 1
+IMAGE_GC_DIR = Path('gc')
+
+gc_logger = logging.getLogger('tourai.image_gc')
+
+def enqueue_invalidation(db: Session, *tags):
+    if tags:
+        enqueue(db, 'invalidate_cache', {'tags': list(dict.fromkeys(tags))})
+
+@job_handler('invalidate_cache')
+def invalidate_cache(db: Session, payload):
+    job_runner.call_async(response_cache.invalidate, *payload['tags'])
+
+@job_handler('invalidate_reviews')
+def invalidate_reviews(db: Session, payload):
+    service_ids = payload['service_ids']
+    tags = [tag for service_id in service_ids for tag in comment_tags(service_id)]
+    job_runner.call_async(response_cache.invalidate, *dict.fromkeys(tags), *business_tags(*service_owner_ids(db, *service_ids)))
+
+@job_handler('image_variants')
+def image_variants(db: Session, payload):
+    if (UPLOAD_DIR / payload['filename']).is_file():
+        schedule_variants(payload['filename']).result()
+
+@job_handler('delete_files')
+def delete_files(db: Session, payload):
+    for filename in payload['filenames']:
+        remove_image_files(filename)
+
+@job_handler('rebuild_ratings')
+def refresh_ratings(db: Session, payload):
+    service_ids = payload['service_ids']
+    rebuild_ratings(db, service_ids)
+    enqueue(db, 'invalidate_reviews', {'service_ids': service_ids})
+    db.commit()
+
+def write_manifest():
+    IMAGE_GC_DIR.mkdir(parents=True, exist_ok=True)
+    cutoff = time.time() - IMAGE_GC_INTERVAL
+    for stale in IMAGE_GC_DIR.glob('*.txt'):
+        if stale.stat().st_mtime < cutoff:
+            stale.unlink(missing_ok=True)
+    with os.scandir(UPLOAD_DIR) as entries:
+        filenames = sorted(entry.name for entry in entries if entry.is_file())
+    manifest = IMAGE_GC_DIR / f"{uuid.uuid4()}.txt"
+    manifest.write_text(''.join(f"{filename}\n" for filename in filenames), encoding='utf-8')
+    return manifest
+
+def read_manifest(manifest: Path, offset: int, limit: int):
+    filenames = []
+    with manifest.open(encoding='utf-8') as handle:
+        handle.seek(offset)
+        while len(filenames) < limit:
+            line = handle.readline()
+            if not line:
+                break
+            filenames.append(line.rstrip('\n'))
+        return filenames, handle.tell()
+
+def remove_unreferenced_files(db: Session, filenames):
+    references = {filename: image_references(filename) for filename in filenames}
+    urls = {url for candidates in references.values() for url in candidates}
+    referenced = {row[0] for row in db.query(ServiceImageModel.image_url).filter(
+        ServiceImageModel.image_url.in_(urls)
+    ).all()} if urls else set()
+    cutoff = time.time() - IMAGE_GC_MIN_AGE
+    removed = []
+    for filename, candidates in references.items():
+        if referenced.intersection(candidates):
+            continue
+        path = UPLOAD_DIR / filename
+        try:
+            if path.stat().st_mtime > cutoff:
+                continue
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        removed.append(filename)
+    return removed
+
+@job_handler('image_gc', periodic=True)
+def collect_images(db: Session, payload):
+    manifest = Path(payload['manifest']) if payload.get('manifest') else None
+    offset = payload.get('offset', 0)
+    if manifest is None or not manifest.is_file():
+        manifest, offset = write_manifest(), 0
+    filenames, offset = read_manifest(manifest, offset, IMAGE_GC_BATCH_SIZE)
+    if filenames:
+        removed = remove_unreferenced_files(db, filenames)
+        if removed:
+            gc_logger.info(f"Removed {len(removed)} unreferenced files from {UPLOAD_DIR}")
+        enqueue(db, 'image_gc', {'manifest': str(manifest), 'offset': offset}, delay=IMAGE_GC_BATCH_DELAY)
+    else:
+        manifest.unlink(missing_ok=True)
+        enqueue_unique(db, 'image_gc', delay=IMAGE_GC_INTERVAL)
+    db.commit()
@@ -0,0 +1,19 @@
+import re
+import unicodedata
+
+MAX_SEARCH_TOKENS = 8
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+def fold_text(text):
+    if not text:
+        return ''
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return stripped.lower()
+
+def build_search_text(*parts):
+    return ' '.join(fold_text(part) for part in parts if part)
+
+def search_tokens(term):
+    return TOKEN_PATTERN.findall(fold_text(term))[:MAX_SEARCH_TOKENS]
@@ -1,8 +1,14 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
+from core.metrics import TimedCheckout, record_statement
 import os
+import time
 
 load_dotenv()
 SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DB_URL")
@@ -10,14 +16,137 @@ SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DB_URL")
 if not SQLALCHEMY_DATABASE_URL:
     raise ValueError("Missing SQLALCHEMY_DB_URL environment variable")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+SQLALCHEMY_REPLICA_DATABASE_URL = os.getenv("SQLALCHEMY_REPLICA_DB_URL")
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+def env_flag(name: str, default: str = "false"):
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+def async_database_url(url: str):
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+class TimedQueuePool(TimedCheckout, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+def engine_options(url: str, is_async: bool = False):
+    options = {"pool_pre_ping": env_flag("DB_POOL_PRE_PING", "true")}
+    if not url.startswith("sqlite"):
+        options.update(
+            poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        )
+    return options
+
+USE_ASYNC_DB = env_flag("USE_ASYNC_DB")
+SQLALCHEMY_ASYNC_DATABASE_URL = os.getenv("SQLALCHEMY_ASYNC_DB_URL") or async_database_url(SQLALCHEMY_DATABASE_URL)
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)  
 
+read_engine = engine
+if SQLALCHEMY_REPLICA_DATABASE_URL:
+    read_engine = create_engine(SQLALCHEMY_REPLICA_DATABASE_URL, **engine_options(SQLALCHEMY_REPLICA_DATABASE_URL))
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal = None
+AsyncReadSessionLocal = None
+if USE_ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL, **engine_options(SQLALCHEMY_ASYNC_DATABASE_URL, is_async=True))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    async_read_engine = async_engine
+    if SQLALCHEMY_REPLICA_DATABASE_URL:
+        replica_url = os.getenv("SQLALCHEMY_ASYNC_REPLICA_DB_URL") or async_database_url(SQLALCHEMY_REPLICA_DATABASE_URL)
+        async_read_engine = create_async_engine(replica_url, **engine_options(replica_url, is_async=True))
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+@event.listens_for(Engine, "before_cursor_execute")
+def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def stop_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    record_statement(statement, time.perf_counter() - conn.info["statement_started"].pop())
+
+@event.listens_for(Engine, "handle_error")
+def record_failed_statement(exception_context):
+    started = exception_context.connection.info.get("statement_started") if exception_context.connection is not None else None
+    if started:
+        record_statement(exception_context.statement or "", time.perf_counter() - started.pop())
+
+def is_read_request(request: Request):
+    return request is not None and request.method in READ_METHODS
+
+def get_db(request: Request = None):
+    db = ReadSessionLocal() if is_read_request(request) else SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+class AsyncSessionRunner:
+    def __init__(self, session):
+        self.session = session
+
+    async def __call__(self, fn, *args, **kwargs):
+        return await self.session.run_sync(fn, *args, **kwargs)
+
+class ThreadpoolSessionRunner:
+    def __init__(self, session):
+        self.session = session
+
+    async def __call__(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+async def get_db_runner(request: Request):
+    read = is_read_request(request)
+    if AsyncSessionLocal is not None:
+        async with (AsyncReadSessionLocal if read else AsyncSessionLocal)() as session:
+            yield AsyncSessionRunner(session)
+    else:
+        db = ReadSessionLocal() if read else SessionLocal()
+        try:
+            yield ThreadpoolSessionRunner(db)
+        finally:
+            await run_in_threadpool(db.close)
+
+def pool_status(bind):
+    pool = getattr(bind, "sync_engine", bind).pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+def pool_statistics():
+    engines = {"primary": engine}
+    if read_engine is not engine:
+        engines["replica"] = read_engine
+    if async_engine is not None:
+        engines["async_primary"] = async_engine
+        if async_read_engine is not async_engine:
+            engines["async_replica"] = async_read_engine
+    return {name: pool_status(bind) for name, bind in engines.items()}
+
+async def dispose_engines():
+    for bind in {async_engine, async_read_engine} - {None}:
+        await bind.dispose()
@@ -0,0 +1,93 @@
+from alembic import op
+import sqlalchemy as sa
+
+LOCK_TIMEOUT = '10s'
+
+def is_postgres():
+    return op.get_bind().dialect.name == 'postgresql'
+
+def table_names():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+def index_names(table: str):
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+def column_names(table: str):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+def add_column_if_missing(table: str, column: sa.Column):
+    if column.name in column_names(table):
+        return False
+    op.add_column(table, column)
+    return True
+
+def primary_key_columns(table: str):
+    return sa.inspect(op.get_bind()).get_pk_constraint(table).get('constrained_columns') or []
+
+def drop_invalid_index(name: str):
+    invalid = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+        "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+    ), {'name': name}).first()
+    if invalid:
+        op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+def create_index_online(name: str, table: str, columns, unique: bool = False):
+    if is_postgres():
+        with op.get_context().autocommit_block():
+            drop_invalid_index(name)
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+def drop_index_online(name: str, table: str):
+    if is_postgres():
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+def delete_duplicates(table: str, columns):
+    null_filter = ' OR '.join(f'{column} IS NULL' for column in columns)
+    deleted = op.get_bind().execute(sa.text(f'DELETE FROM {table} WHERE {null_filter}')).rowcount
+    if is_postgres():
+        matches = ' AND '.join(f'a.{column} = b.{column}' for column in columns)
+        statement = f'DELETE FROM {table} a USING {table} b WHERE a.ctid < b.ctid AND {matches}'
+    else:
+        statement = f"DELETE FROM {table} WHERE rowid NOT IN (SELECT min(rowid) FROM {table} GROUP BY {', '.join(columns)})"
+    return deleted + op.get_bind().execute(sa.text(statement)).rowcount
+
+def set_not_null_online(table: str, column: str):
+    check = f'{table}_{column}_not_null'
+    with op.get_context().autocommit_block():
+        op.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {check}')
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {check} CHECK ({column} IS NOT NULL) NOT VALID')
+        op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {check}')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL')
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT {check}')
+        op.execute('RESET lock_timeout')
+
+def add_primary_key_online(table: str, columns):
+    if primary_key_columns(table):
+        return 0
+    removed = delete_duplicates(table, columns)
+    name = f'{table}_pkey'
+    if not is_postgres():
+        create_index_online(name, table, columns, unique=True)
+        return removed
+    create_index_online(name, table, columns, unique=True)
+    for column in columns:
+        set_not_null_online(table, column)
+    with op.get_context().autocommit_block():
+        op.execute(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} PRIMARY KEY USING INDEX {name}')
+        op.execute('RESET lock_timeout')
+    return removed
+
+def drop_primary_key(table: str):
+    name = f'{table}_pkey'
+    if is_postgres():
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}')
+    else:
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,245 @@
+"""baseline schema from DB.txt
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+import math
+import re
+import unicodedata
+from alembic import op
+import sqlalchemy as sa
+from migrations.online import add_column_if_missing, index_names, is_postgres, table_names
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BASE_TABLES = {'admin', 'users', 'service', 'service_image', 'comment', 'own_service', 'favorite'}
+SERVICE_INDEXES = [
+    ('ix_service_geo_cell', ['geo_cell']),
+    ('ix_service_favorite_count', ['favorite_count', 'id']),
+]
+
+BACKFILL_BATCH_SIZE = 1000
+GEO_CELL_DEGREES = 0.05
+COORDINATE_PATTERN = re.compile(r'(-?\d{1,3}(?:\.\d+)?)\s*[,;\s]\s*(-?\d{1,3}(?:\.\d+)?)')
+
+service_table = sa.table(
+    'service',
+    sa.column('id', sa.Integer),
+    sa.column('name', sa.String),
+    sa.column('description', sa.Text),
+    sa.column('address', sa.String),
+    sa.column('geolocation', sa.String),
+    sa.column('search_text', sa.Text),
+    sa.column('latitude', sa.Float),
+    sa.column('longitude', sa.Float),
+    sa.column('geo_cell', sa.String),
+)
+
+REBUILD_RATINGS = (
+    "INSERT INTO service_rating "
+    "(service_id, rating_count, rating_sum, average_rating, rating_1, rating_2, rating_3, rating_4, rating_5) "
+    "SELECT service.id, count(comment.rating), coalesce(sum(comment.rating), 0), avg(comment.rating), "
+    + ', '.join(f'coalesce(sum(CASE WHEN comment.rating = {value} THEN 1 ELSE 0 END), 0)' for value in range(1, 6))
+    + " FROM service LEFT OUTER JOIN comment ON comment.service_id = service.id GROUP BY service.id"
+)
+
+SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_service_search_tsv ON service USING GIN (to_tsvector('simple', coalesce(search_text, '')))",
+    "CREATE INDEX IF NOT EXISTS ix_service_search_trgm ON service USING GIN (search_text gin_trgm_ops)",
+]
+
+def tables():
+    return [
+        ('admin', lambda: op.create_table(
+            'admin',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('user_name', sa.String(255), nullable=False),
+            sa.Column('password', sa.String(255), nullable=False),
+        )),
+        ('users', lambda: op.create_table(
+            'users',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('full_name', sa.String(255), nullable=False),
+            sa.Column('age', sa.Integer),
+            sa.Column('user_name', sa.String(255), nullable=False),
+            sa.Column('password', sa.String(255), nullable=False),
+            sa.Column('role', sa.String(50), nullable=False),
+        )),
+        ('service', lambda: op.create_table(
+            'service',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('name', sa.String(255), nullable=False),
+            sa.Column('description', sa.Text),
+            sa.Column('address', sa.String(255)),
+            sa.Column('geolocation', sa.String(255)),
+            sa.Column('type', sa.String(50)),
+            sa.Column('phone', sa.String(20)),
+            sa.Column('website', sa.String(255)),
+            sa.Column('email', sa.String(255)),
+            sa.Column('created_at', sa.TIMESTAMP, server_default=sa.func.current_timestamp()),
+            sa.Column('search_text', sa.Text),
+            sa.Column('latitude', sa.Float),
+            sa.Column('longitude', sa.Float),
+            sa.Column('geo_cell', sa.String(32)),
+            sa.Column('favorite_count', sa.Integer, nullable=False, server_default='0'),
+        )),
+        ('service_image', lambda: op.create_table(
+            'service_image',
+            sa.Column('service_id', sa.Integer, sa.ForeignKey('service.id', ondelete='CASCADE')),
+            sa.Column('image_url', sa.Text, nullable=False),
+        )),
+        ('comment', lambda: op.create_table(
+            'comment',
+            sa.Column('service_id', sa.Integer, sa.ForeignKey('service.id', ondelete='CASCADE')),
+            sa.Column('users_id', sa.Integer, sa.ForeignKey('users.id', ondelete='CASCADE')),
+            sa.Column('title', sa.String(255)),
+            sa.Column('content', sa.Text),
+            sa.Column('rating', sa.Integer),
+            sa.Column('created_at', sa.TIMESTAMP, server_default=sa.func.current_timestamp()),
+        )),
+        ('own_service', lambda: op.create_table(
+            'own_service',
+            sa.Column('users_id', sa.Integer, sa.ForeignKey('users.id', ondelete='CASCADE')),
+            sa.Column('service_id', sa.Integer, sa.ForeignKey('service.id', ondelete='CASCADE')),
+        )),
+        ('favorite', lambda: op.create_table(
+            'favorite',
+            sa.Column('users_id', sa.Integer, sa.ForeignKey('users.id', ondelete='CASCADE')),
+            sa.Column('service_id', sa.Integer, sa.ForeignKey('service.id', ondelete='CASCADE')),
+        )),
+        ('service_rating', lambda: op.create_table(
+            'service_rating',
+            sa.Column('service_id', sa.Integer, sa.ForeignKey('service.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('rating_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('rating_sum', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('average_rating', sa.Float),
+            *[sa.Column(f'rating_{value}', sa.Integer, nullable=False, server_default='0') for value in range(1, 6)],
+        )),
+        ('catalog_import', lambda: op.create_table(
+            'catalog_import',
+            sa.Column('id', sa.Integer, primary_key=True),
+            sa.Column('owner_id', sa.Integer, sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('file_path', sa.Text, nullable=False),
+            sa.Column('format', sa.String(10), nullable=False),
+            sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+            sa.Column('processed_rows', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('inserted_rows', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('error_count', sa.Integer, nullable=False, server_default='0'),
+            sa.Column('last_error', sa.Text),
+            sa.Column('created_at', sa.TIMESTAMP, server_default=sa.func.current_timestamp()),
+            sa.Column('updated_at', sa.TIMESTAMP, server_default=sa.func.current_timestamp()),
+        )),
+        ('catalog_import_error', lambda: op.create_table(
+            'catalog_import_error',
+            sa.Column('import_id', sa.Integer, sa.ForeignKey('catalog_import.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('row_number', sa.Integer, primary_key=True),
+            sa.Column('error', sa.Text, nullable=False),
+        )),
+    ]
+
+def fold_text(text):
+    if not text:
+        return ''
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+def parse_geolocation(value):
+    if not value:
+        return None
+    for match in COORDINATE_PATTERN.finditer(value):
+        lat, lon = float(match.group(1)), float(match.group(2))
+        if -90 <= lat <= 90 and -180 <= lon <= 180:
+            return lat, lon
+    return None
+
+def backfill_services(columns, values):
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(service_table.c.id, *[service_table.c[name] for name in columns])
+            .where(service_table.c.id > last_id).order_by(service_table.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        bind.execute(
+            service_table.update().where(service_table.c.id == sa.bindparam('row_id')),
+            [dict(values(row), row_id=row.id) for row in rows]
+        )
+        last_id = rows[-1].id
+
+def search_text_values(row):
+    return {'search_text': ' '.join(fold_text(part) for part in (row.name, row.description, row.address) if part)}
+
+def geo_values(row):
+    coordinates = parse_geolocation(row.geolocation)
+    if not coordinates:
+        return {'latitude': None, 'longitude': None, 'geo_cell': None}
+    lat, lon = coordinates
+    return {
+        'latitude': lat,
+        'longitude': lon,
+        'geo_cell': f'{math.floor(lat / GEO_CELL_DEGREES)}:{math.floor(lon / GEO_CELL_DEGREES)}',
+    }
+
+def backfill_search_text():
+    backfill_services(['name', 'description', 'address'], search_text_values)
+
+def backfill_geo():
+    backfill_services(['geolocation'], geo_values)
+
+def backfill_favorite_counts():
+    op.execute(
+        "UPDATE service SET favorite_count = "
+        "(SELECT count(*) FROM favorite WHERE favorite.service_id = service.id)"
+    )
+
+def service_columns():
+    return [
+        (sa.Column('search_text', sa.Text), backfill_search_text),
+        (sa.Column('latitude', sa.Float), None),
+        (sa.Column('longitude', sa.Float), None),
+        (sa.Column('geo_cell', sa.String(32)), backfill_geo),
+        (sa.Column('favorite_count', sa.Integer, nullable=False, server_default='0'), backfill_favorite_counts),
+    ]
+
+def upgrade():
+    existing = table_names()
+    for name, create in tables():
+        if name not in existing:
+            create()
+
+    added = [backfill for column, backfill in service_columns() if add_column_if_missing('service', column)]
+    if 'service' in existing:
+        for backfill in filter(None, added):
+            backfill()
+
+    if 'service_rating' not in existing and 'comment' in existing:
+        op.execute(REBUILD_RATINGS)
+
+    service_indexes = index_names('service')
+    for name, columns in SERVICE_INDEXES:
+        if name not in service_indexes:
+            op.create_index(name, 'service', columns)
+    if is_postgres():
+        for statement in SEARCH_DDL:
+            op.execute(statement)
+
+def downgrade():
+    if is_postgres():
+        op.execute("DROP INDEX IF EXISTS ix_service_search_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_service_search_tsv")
+    for name, _ in reversed(SERVICE_INDEXES):
+        op.drop_index(name, table_name='service', if_exists=True)
+    for name, _ in reversed(tables()):
+        if name not in BASE_TABLES:
+            op.drop_table(name)
+    with op.batch_alter_table('service') as batch_op:
+        for column, _ in reversed(service_columns()):
+            batch_op.drop_column(column.name)
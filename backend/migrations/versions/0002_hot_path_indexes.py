@@ -0,0 +1,94 @@
+"""composite keys and hot-path indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+import hashlib
+from alembic import op
+import sqlalchemy as sa
+from migrations.online import (
+    add_column_if_missing, add_primary_key_online, create_index_online, drop_index_online, drop_primary_key,
+    is_postgres, primary_key_columns,
+)
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+PRIMARY_KEYS = [
+    ('comment', ['service_id', 'users_id']),
+    ('own_service', ['users_id', 'service_id']),
+    ('favorite', ['users_id', 'service_id']),
+    ('service_image', ['service_id', 'image_hash']),
+]
+
+INDEXES = [
+    ('ix_comment_users_id', 'comment', ['users_id']),
+    ('ix_own_service_service_id', 'own_service', ['service_id']),
+    ('ix_favorite_service_id', 'favorite', ['service_id']),
+    ('ix_service_type_created_at', 'service', ['type', 'created_at']),
+]
+
+IMAGE_HASH_BATCH_SIZE = 1000
+
+REBUILD_RATINGS = (
+    "INSERT INTO service_rating "
+    "(service_id, rating_count, rating_sum, average_rating, rating_1, rating_2, rating_3, rating_4, rating_5) "
+    "SELECT service.id, count(comment.rating), coalesce(sum(comment.rating), 0), avg(comment.rating), "
+    + ', '.join(f'coalesce(sum(CASE WHEN comment.rating = {value} THEN 1 ELSE 0 END), 0)' for value in range(1, 6))
+    + " FROM service LEFT OUTER JOIN comment ON comment.service_id = service.id GROUP BY service.id"
+)
+
+def refresh_aggregates(removed):
+    if removed.get('comment'):
+        op.execute("DELETE FROM service_rating")
+        op.execute(REBUILD_RATINGS)
+    if removed.get('favorite'):
+        op.execute(
+            "UPDATE service SET favorite_count = "
+            "(SELECT count(*) FROM favorite WHERE favorite.service_id = service.id)"
+        )
+
+def backfill_image_hashes():
+    bind = op.get_bind()
+    if is_postgres():
+        with op.get_context().autocommit_block():
+            while bind.execute(sa.text(
+                "UPDATE service_image SET image_hash = md5(image_url) WHERE ctid IN "
+                "(SELECT ctid FROM service_image WHERE image_hash IS NULL AND image_url IS NOT NULL LIMIT :limit)"
+            ), {'limit': IMAGE_HASH_BATCH_SIZE}).rowcount:
+                pass
+        return
+    while True:
+        rows = bind.execute(sa.text(
+            "SELECT rowid, image_url FROM service_image WHERE image_hash IS NULL AND image_url IS NOT NULL LIMIT :limit"
+        ), {'limit': IMAGE_HASH_BATCH_SIZE}).all()
+        if not rows:
+            return
+        bind.execute(sa.text("UPDATE service_image SET image_hash = :image_hash WHERE rowid = :row_id"), [
+            {'image_hash': hashlib.md5(image_url.encode('utf-8')).hexdigest(), 'row_id': row_id}
+            for row_id, image_url in rows
+        ])
+
+def prepare_service_image():
+    if primary_key_columns('service_image') == ['service_id', 'image_url']:
+        drop_primary_key('service_image')
+    add_column_if_missing('service_image', sa.Column('image_hash', sa.String(32)))
+    backfill_image_hashes()
+
+def upgrade():
+    prepare_service_image()
+    removed = {table: add_primary_key_online(table, columns) for table, columns in PRIMARY_KEYS}
+    for name, table, columns in INDEXES:
+        create_index_online(name, table, columns)
+    refresh_aggregates(removed)
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        drop_index_online(name, table)
+    for table, _ in reversed(PRIMARY_KEYS):
+        drop_primary_key(table)
+    with op.batch_alter_table('service_image') as batch_op:
+        batch_op.drop_column('image_hash')
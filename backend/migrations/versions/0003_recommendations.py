@@ -0,0 +1,33 @@
+"""top-K similarity and recommendation tables
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'service_similarity',
+        sa.Column('service_id', sa.Integer, sa.ForeignKey('service.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('rank', sa.SmallInteger, primary_key=True),
+        sa.Column('similar_service_id', sa.Integer, sa.ForeignKey('service.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('score', sa.Float, nullable=False),
+    )
+    op.create_table(
+        'user_recommendation',
+        sa.Column('users_id', sa.Integer, sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('rank', sa.SmallInteger, primary_key=True),
+        sa.Column('service_id', sa.Integer, sa.ForeignKey('service.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('score', sa.Float, nullable=False),
+    )
+
+def downgrade():
+    op.drop_table('user_recommendation')
+    op.drop_table('service_similarity')
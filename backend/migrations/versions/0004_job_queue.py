@@ -0,0 +1,35 @@
+"""durable background job queue
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'job',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('kind', sa.String(50), nullable=False),
+        sa.Column('payload', sa.Text, nullable=False, server_default='{}'),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer, nullable=False, server_default='5'),
+        sa.Column('run_at', sa.TIMESTAMP, nullable=False, server_default=sa.func.current_timestamp()),
+        sa.Column('locked_at', sa.TIMESTAMP),
+        sa.Column('locked_by', sa.String(64)),
+        sa.Column('last_error', sa.Text),
+        sa.Column('created_at', sa.TIMESTAMP, server_default=sa.func.current_timestamp()),
+        sa.Column('updated_at', sa.TIMESTAMP, server_default=sa.func.current_timestamp()),
+    )
+    op.create_index('ix_job_status_run_at', 'job', ['status', 'run_at'])
+
+def downgrade():
+    op.drop_index('ix_job_status_run_at', table_name='job')
+    op.drop_table('job')
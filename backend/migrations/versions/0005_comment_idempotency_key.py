@@ -0,0 +1,24 @@
+"""comment idempotency key
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from migrations.online import column_names
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if 'idempotency_key' in column_names('comment'):
+        return
+    with op.batch_alter_table('comment') as batch_op:
+        batch_op.add_column(sa.Column('idempotency_key', sa.String(64)))
+
+def downgrade():
+    with op.batch_alter_table('comment') as batch_op:
+        batch_op.drop_column('idempotency_key')
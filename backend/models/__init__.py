@@ -5,6 +5,10 @@ from .service_image import ServiceImage
 from .comment import Comment
 from .own_service import OwnService
 from .favorite import Favorite
+from .service_rating import ServiceRating
+from .catalog_import import CatalogImport, CatalogImportError
+from .recommendation import ServiceSimilarity, UserRecommendation
+from .job import Job
 from sqlalchemy.orm import relationship
 
 Service.images = relationship("ServiceImage", back_populates="service")
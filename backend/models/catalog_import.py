@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from db import Base
+
+class CatalogImport(Base):
+    __tablename__ = 'catalog_import'
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    file_path = Column(Text, nullable=False)
+    format = Column(String(10), nullable=False)
+    status = Column(String(20), nullable=False, default='pending')
+    processed_rows = Column(Integer, nullable=False, default=0)
+    inserted_rows = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    created_at = Column(TIMESTAMP, default=func.now())
+    updated_at = Column(TIMESTAMP, default=func.now(), onupdate=func.now())
+
+    errors = relationship("CatalogImportError", back_populates="catalog_import", passive_deletes=True)
+
+class CatalogImportError(Base):
+    __tablename__ = 'catalog_import_error'
+
+    import_id = Column(Integer, ForeignKey('catalog_import.id', ondelete='CASCADE'), primary_key=True)
+    row_number = Column(Integer, primary_key=True)
+    error = Column(Text, nullable=False)
+
+    catalog_import = relationship("CatalogImport", back_populates="errors")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Index, Integer, String, Text, ForeignKey, TIMESTAMP
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from db import Base
@@ -12,6 +12,11 @@ class Comment(Base):
     content = Column(Text)
     rating = Column(Integer)
     created_at = Column(TIMESTAMP, default=func.now())
+    idempotency_key = Column(String(64))
+
+    __table_args__ = (
+        Index('ix_comment_users_id', 'users_id'),
+    )
 
     service = relationship("Service", back_populates="comments")
     users = relationship("User", back_populates="comments")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Index, Integer, ForeignKey
 from sqlalchemy.orm import relationship
 from db import Base
 
@@ -8,5 +8,9 @@ class Favorite(Base):
     users_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
     service_id = Column(Integer, ForeignKey('service.id', ondelete='CASCADE'), primary_key=True)
 
+    __table_args__ = (
+        Index('ix_favorite_service_id', 'service_id'),
+    )
+
     users = relationship("User", back_populates="favorites")
     service = relationship("Service", back_populates="favorites")
@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import Column, Index, Integer, String, Text, TIMESTAMP
+from sqlalchemy.sql import func
+from db import Base
+
+class Job(Base):
+    __tablename__ = 'job'
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False, default='{}')
+    status = Column(String(20), nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(TIMESTAMP, nullable=False, default=datetime.utcnow)
+    locked_at = Column(TIMESTAMP)
+    locked_by = Column(String(64))
+    last_error = Column(Text)
+    created_at = Column(TIMESTAMP, default=func.now())
+    updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Index, Integer, String, Text, ForeignKey, TIMESTAMP
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from db import Base
@@ -9,5 +9,9 @@ class OwnService(Base):
     users_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
     service_id = Column(Integer, ForeignKey('service.id', ondelete='CASCADE'), primary_key=True)
 
+    __table_args__ = (
+        Index('ix_own_service_service_id', 'service_id'),
+    )
+
     users = relationship("User", back_populates="own_services")
     service = relationship("Service", back_populates="own_services")
\ No newline at end of file
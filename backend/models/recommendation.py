@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Float, ForeignKey, Integer, SmallInteger
+from db import Base
+
+class ServiceSimilarity(Base):
+    __tablename__ = 'service_similarity'
+
+    service_id = Column(Integer, ForeignKey('service.id', ondelete='CASCADE'), primary_key=True)
+    rank = Column(SmallInteger, primary_key=True)
+    similar_service_id = Column(Integer, ForeignKey('service.id', ondelete='CASCADE'), nullable=False)
+    score = Column(Float, nullable=False)
+
+class UserRecommendation(Base):
+    __tablename__ = 'user_recommendation'
+
+    users_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    rank = Column(SmallInteger, primary_key=True)
+    service_id = Column(Integer, ForeignKey('service.id', ondelete='CASCADE'), nullable=False)
+    score = Column(Float, nullable=False)
@@ -1,7 +1,23 @@
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP
+from sqlalchemy import Column, Float, Index, Integer, String, Text, TIMESTAMP
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from db import Base
+from core.text import build_search_text
+from core.geo import geo_cell, parse_geolocation
+
+def default_search_text(context):
+    params = context.get_current_parameters()
+    return build_search_text(params.get('name'), params.get('description'), params.get('address'))
+
+def default_coordinate(position):
+    def default(context):
+        coordinates = parse_geolocation(context.get_current_parameters().get('geolocation'))
+        return coordinates[position] if coordinates else None
+    return default
+
+def default_geo_cell(context):
+    coordinates = parse_geolocation(context.get_current_parameters().get('geolocation'))
+    return geo_cell(*coordinates) if coordinates else None
 
 class Service(Base):
     __tablename__ = 'service'
@@ -16,8 +32,19 @@ class Service(Base):
     website = Column(String(255))
     email = Column(String(255))
     created_at = Column(TIMESTAMP, default=func.now())
+    search_text = Column(Text, default=default_search_text)
+    latitude = Column(Float, default=default_coordinate(0))
+    longitude = Column(Float, default=default_coordinate(1))
+    geo_cell = Column(String(32), index=True, default=default_geo_cell)
+    favorite_count = Column(Integer, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        Index('ix_service_favorite_count', 'favorite_count', 'id'),
+        Index('ix_service_type_created_at', 'type', 'created_at'),
+    )
 
     images = relationship('ServiceImage', back_populates='service', cascade='all, delete-orphan')
     comments = relationship("Comment", back_populates="service")
     own_services = relationship("OwnService", back_populates="service", cascade='all, delete-orphan')
-    favorites = relationship("Favorite", back_populates="service")
\ No newline at end of file
+    favorites = relationship("Favorite", back_populates="service")
+    rating = relationship("ServiceRating", back_populates="service", uselist=False, passive_deletes=True)
\ No newline at end of file
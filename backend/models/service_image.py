@@ -1,11 +1,19 @@
-from sqlalchemy import Column, Integer, ForeignKey, Text
+import hashlib
+from sqlalchemy import Column, Integer, ForeignKey, String, Text
 from sqlalchemy.orm import relationship
 from db import Base
 
+def hash_image_url(image_url: str):
+    return hashlib.md5(image_url.encode('utf-8')).hexdigest()
+
 class ServiceImage(Base):
     __tablename__ = 'service_image'
 
     service_id = Column(Integer, ForeignKey('service.id', ondelete='CASCADE'), primary_key=True)
+    image_hash = Column(
+        String(32), primary_key=True,
+        default=lambda context: hash_image_url(context.get_current_parameters()['image_url'])
+    )
     image_url = Column(Text, nullable=False)
 
     service = relationship("Service", back_populates="images")
\ No newline at end of file
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey
+from sqlalchemy.orm import relationship
+from db import Base
+
+class ServiceRating(Base):
+    __tablename__ = 'service_rating'
+
+    service_id = Column(Integer, ForeignKey('service.id', ondelete='CASCADE'), primary_key=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    average_rating = Column(Float)
+    rating_1 = Column(Integer, nullable=False, default=0)
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
+
+    service = relationship("Service", back_populates="rating")
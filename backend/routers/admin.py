@@ -1,22 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from db import SessionLocal
+from db import get_db, pool_statistics
 from models.admin import Admin as AdminModel
 from schemas.admin import Admin as AdminSchema, AdminCreate
-import bcrypt
+from core.passwords import hash_password_sync
+from .auth import require_admin
 
 router = APIRouter(
     prefix='/api/v1/admin',
     tags=['Admin']
 )
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post('/', response_model=AdminSchema, status_code=status.HTTP_201_CREATED)
 def create_admin(admin: AdminCreate, db: Session = Depends(get_db)):
     existing_admin = db.query(AdminModel).filter(AdminModel.user_name == admin.user_name).first()
@@ -26,11 +20,11 @@ def create_admin(admin: AdminCreate, db: Session = Depends(get_db)):
             detail="Admin with this username already exists."
         )
     
-    hashed_password = bcrypt.hashpw(admin.password.encode('utf-8'), bcrypt.gensalt())
+    hashed_password = hash_password_sync(admin.password)
     
     new_admin = AdminModel(
         user_name=admin.user_name,
-        password=hashed_password.decode('utf-8')
+        password=hashed_password
     )
     
     db.add(new_admin)
@@ -38,3 +32,7 @@ def create_admin(admin: AdminCreate, db: Session = Depends(get_db)):
     db.refresh(new_admin)
     
     return new_admin
+
+@router.get('/db/pool', dependencies=[Depends(require_admin)])
+def get_pool_statistics():
+    return pool_statistics()
@@ -3,8 +3,9 @@ from sqlalchemy.orm import Session
 from schemas.user import UserCreate
 from models.user import User as UserModel
 from models.admin import Admin as AdminModel
-from db import get_db
-from passlib.context import CryptContext
+from db import get_db, get_db_runner
+from core.passwords import hash_password, verify_password
+from core.principal import Principal, principal_cache
 from jose import JWTError, jwt
 import logging
 from datetime import datetime, timedelta
@@ -14,8 +15,6 @@ SECRET_KEY = config('SECRET_KEY', default='a6s7d8vv74ck2kf0vm20c87d8gw9w6v8d86s7
 ALGORITHM = 'HS256'
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 router = APIRouter(
     prefix='/api/v1/auth',
     tags=['Authentication']
@@ -30,18 +29,43 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def find_user(db: Session, user_name: str):
+    return db.query(UserModel).filter(UserModel.user_name == user_name).first()
+
+def find_admin(db: Session, user_name: str):
+    return db.query(AdminModel).filter(AdminModel.user_name == user_name).first()
+
+def add_user(db: Session, user: UserModel):
+    db.add(user)
+    db.commit()
+
+def update_password_hash(db: Session, model, record_id: int, hashed_password: str):
+    db.query(model).filter(model.id == record_id).update({"password": hashed_password}, synchronize_session=False)
+    db.commit()
+
+def set_access_cookie(response: Response, data: dict):
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(data=data, expires_delta=access_token_expires)
+    response.set_cookie(
+        key="access_token",
+        value=access_token,
+        httponly=True,
+        secure=False,
+        samesite="Lax"
+    )
+
 @router.post("/register")
-def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, run=Depends(get_db_runner)):
     logging.debug(f"Received user data: {user_data.dict()}")
     try:
-        existing_user = db.query(UserModel).filter(UserModel.user_name == user_data.user_name).first()
+        existing_user = await run(find_user, user_data.user_name)
         if existing_user:
             logging.warning("Username already exists")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tên đăng nhập đã tồn tại")
         if user_data.password != user_data.confirmPassword:
             logging.warning("Passwords do not match")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Mật khẩu không khớp")
-        hashed_password = pwd_context.hash(user_data.password)
+        hashed_password = await hash_password(user_data.password)
         new_user = UserModel(
             full_name=user_data.full_name,
             age=user_data.age,
@@ -49,9 +73,7 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
             password=hashed_password,
             role=user_data.role
         )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await run(add_user, new_user)
         
         logging.info("User created successfully")
         return {"message": f"Tạo tài khoản {user_data.role.lower()} thành công"}, 200
@@ -65,40 +87,30 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
 @router.post('/login')
-def login(login_data: dict, db: Session = Depends(get_db), response: Response = None):
+async def login(login_data: dict, response: Response, run=Depends(get_db_runner)):
     try:
         user_name = login_data.get('user_name')
         password = login_data.get('password')
-        user = db.query(UserModel).filter(UserModel.user_name == user_name).first()
-        if user and pwd_context.verify(password, user.password):
-            access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-            access_token = create_access_token(
-                data={"sub": user.user_name, "role": user.role, "user_id": user.id},
-                expires_delta=access_token_expires
-            )
-            response.set_cookie(
-                key="access_token",
-                value=access_token,
-                httponly=True,
-                secure=False,
-                samesite="Lax"
-            )
-            return {"user_name": user.user_name, "full_name": user.full_name, "role": user.role, "user_id": user.id}
-        admin = db.query(AdminModel).filter(AdminModel.user_name == user_name).first()
-        if admin and pwd_context.verify(password, admin.password):
-            access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-            access_token = create_access_token(
-                data={"sub": admin.user_name, "role": "admin", "user_id": admin.id},
-                expires_delta=access_token_expires
-            )
-            response.set_cookie(
-                key="access_token",
-                value=access_token,
-                httponly=True,
-                secure=False,
-                samesite="Lax"
-            )
-            return {"user_name": admin.user_name, "role": "admin", "user_id": admin.id}
+        if not user_name or not password:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password")
+
+        user = await run(find_user, user_name)
+        if user:
+            valid, new_hash = await verify_password(password, user.password)
+            if valid:
+                if new_hash:
+                    await run(update_password_hash, UserModel, user.id, new_hash)
+                set_access_cookie(response, {"sub": user.user_name, "role": user.role, "user_id": user.id})
+                return {"user_name": user.user_name, "full_name": user.full_name, "role": user.role, "user_id": user.id}
+
+        admin = await run(find_admin, user_name)
+        if admin:
+            valid, new_hash = await verify_password(password, admin.password)
+            if valid:
+                if new_hash:
+                    await run(update_password_hash, AdminModel, admin.id, new_hash)
+                set_access_cookie(response, {"sub": admin.user_name, "role": "admin", "user_id": admin.id})
+                return {"user_name": admin.user_name, "role": "admin", "user_id": admin.id}
 
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password")
         
@@ -110,32 +122,63 @@ def login(login_data: dict, db: Session = Depends(get_db), response: Response =
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
 
+def decode_access_token(token: str):
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
 def get_current_user(request: Request):
     token = request.cookies.get('access_token')
     if token:
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            user_name: str = payload.get("sub")
-        except JWTError:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        principal = principal_cache.get(token)
+        if principal is not None:
+            return principal.user_name
+        payload = decode_access_token(token)
+        user_name: str = payload.get("sub")
         return user_name
     else:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
-@router.get('/me')
-def get_me(request: Request, db: Session = Depends(get_db)):
-    user_name = get_current_user(request)
-    user = db.query(UserModel).filter(UserModel.user_name == user_name).first()
+def resolve_principal(db: Session, user_name: str):
+    user = find_user(db, user_name)
     if user:
-        return {"full_name": user.full_name, "role": user.role, "user_id": user.id}
-    
-    admin = db.query(AdminModel).filter(AdminModel.user_name == user_name).first()
+        return Principal.from_user(user)
+    admin = find_admin(db, user_name)
     if admin:
-        return {"user_name": admin.user_name, "role": "admin", "user_id": admin.id}
-    
-    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        return Principal.from_admin(admin)
+    return None
+
+async def get_current_principal(request: Request, run=Depends(get_db_runner)):
+    token = request.cookies.get('access_token')
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    payload = decode_access_token(token)
+    principal = await run(resolve_principal, payload.get("sub"))
+    if principal is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    principal_cache.put(token, principal, payload["exp"])
+    return principal
+
+def require_admin(principal: Principal = Depends(get_current_principal)):
+    if principal.kind != 'admin':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return principal
+
+@router.get('/me')
+async def get_me(principal: Principal = Depends(get_current_principal)):
+    if principal.kind == 'user':
+        return {"full_name": principal.full_name, "role": principal.role, "user_id": principal.id}
+    return {"user_name": principal.user_name, "role": "admin", "user_id": principal.id}
     
 @router.post('/logout')
-def logout(response: Response):
+def logout(request: Request, response: Response):
+    token = request.cookies.get('access_token')
+    if token:
+        principal_cache.discard(token)
     response.delete_cookie('access_token')
     return {"message": "Logged out successfully"}
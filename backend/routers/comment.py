@@ -1,163 +1,322 @@
+import logging
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import asc, desc
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from db import SessionLocal
+from db import ReadSessionLocal, get_db, get_db_runner
 from models.comment import Comment as CommentModel
 from models.service import Service as ServiceModel
 from models.user import User as UserModel
 from models.own_service import OwnService as OwnServiceModel
-from schemas.comment import CommentCreate, Comment as CommentSchema
+from schemas.comment import BusinessStats, CommentCreate, Comment as CommentSchema, ReviewBatch, ReviewBatchResult
+from core.pagination import order_clauses, paginate
+from core.ratings import apply_rating, rebuild_ratings
+from core.analytics import business_stats
+from core.cache import business_tags, response_cache
+from core.jobs import enqueue
+from core.principal import Principal
+from core.streaming import STREAM_BATCH_SIZE, streaming_response
+from core.serialization import FastJSONResponse, dumps, rows_to_dicts
+from .auth import get_current_principal
+from decouple import config
 
 router = APIRouter(
     prefix='/api/v1/comment',
     tags=['Comment']
 )
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+MAX_REVIEW_BATCH = config('MAX_REVIEW_BATCH', default=500, cast=int)
+REVIEW_FIELDS = ('title', 'content', 'rating', 'service_id', 'users_id')
+
+COMMENT_COLUMNS = (
+    CommentModel.title,
+    CommentModel.content,
+    CommentModel.rating,
+    CommentModel.service_id,
+    CommentModel.users_id,
+    CommentModel.created_at,
+    UserModel.full_name,
+)
+COMMENT_KEYS = tuple(column.key for column in COMMENT_COLUMNS)
+
+def comment_query(db: Session):
+    return db.query(*COMMENT_COLUMNS).outerjoin(UserModel, UserModel.id == CommentModel.users_id)
+
+def comment_ordering(sort_by: Optional[str]):
+    tie_breaker = [(CommentModel.service_id, False), (CommentModel.users_id, False)]
+    if sort_by == "rating_asc":
+        return [(func.coalesce(CommentModel.rating, 0), False)] + tie_breaker
+    elif sort_by == "rating_desc":
+        return [(func.coalesce(CommentModel.rating, 0), True)] + tie_breaker
+    elif sort_by == "created_at_asc":
+        return [(CommentModel.created_at, False)] + tie_breaker
+    elif sort_by == "created_at_desc":
+        return [(CommentModel.created_at, True)] + tie_breaker
+    return tie_breaker
+
+def apply_comment_filters(query, type, min_rating, max_rating):
+    if type:
+        query = query.join(ServiceModel, ServiceModel.id == CommentModel.service_id).filter(ServiceModel.type == type)
+    if min_rating is not None:
+        query = query.filter(CommentModel.rating >= min_rating)
+    if max_rating is not None:
+        query = query.filter(CommentModel.rating <= max_rating)
+    return query
+
+def comment_page(query, sort_by, limit, cursor):
+    rows, next_cursor = paginate(query, comment_ordering(sort_by), limit, cursor)
+    return rows_to_dicts(rows, COMMENT_KEYS), next_cursor
+
+def comment_page_response(page):
+    comments, next_cursor = page
+    return FastJSONResponse(comments, headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None)
+
+def list_service_comments(db: Session, service_id, sort_by, limit, cursor):
+    query = comment_query(db).filter(CommentModel.service_id == service_id)
+    return comment_page(query, sort_by, limit, cursor)
+
+def list_comments(db: Session, type, min_rating, max_rating, sort_by, limit, cursor):
+    query = apply_comment_filters(comment_query(db), type, min_rating, max_rating)
+    return comment_page(query, sort_by, limit, cursor)
+
+def business_comment_query(db: Session, user_id: int):
+    return comment_query(db).join(
+        OwnServiceModel, OwnServiceModel.service_id == CommentModel.service_id
+    ).filter(OwnServiceModel.users_id == user_id)
+
+def list_business_comments(db: Session, user_id, type, min_rating, max_rating, sort_by, limit, cursor):
+    query = business_comment_query(db, user_id)
+    query = apply_comment_filters(query, type, min_rating, max_rating)
+    return comment_page(query, sort_by, limit, cursor)
+
+def stream_comments(db: Session, service_id, user_id, type, min_rating, max_rating, sort_by):
+    query = business_comment_query(db, user_id) if user_id is not None else comment_query(db)
+    if service_id is not None:
+        query = query.filter(CommentModel.service_id == service_id)
+    query = apply_comment_filters(query, type, min_rating, max_rating)
+    query = query.order_by(*order_clauses(comment_ordering(sort_by)))
+    for row in query.yield_per(STREAM_BATCH_SIZE):
+        yield dumps(dict(zip(COMMENT_KEYS, row)))
+
+@router.get('/stream')
+def stream_all_comments(
+    format: str = Query("ndjson", regex="^(ndjson|json)$"),
+    type: Optional[str] = Query(None),
+    min_rating: Optional[int] = Query(None),
+    max_rating: Optional[int] = Query(None),
+    sort_by: Optional[str] = Query(None)
+):
+    return streaming_response(ReadSessionLocal, stream_comments, None, None, type, min_rating, max_rating, sort_by, format=format)
+
+@router.get('/{service_id}/stream')
+def stream_service_comments(
+    service_id: int,
+    format: str = Query("ndjson", regex="^(ndjson|json)$"),
+    sort_by: Optional[str] = Query(None)
+):
+    return streaming_response(ReadSessionLocal, stream_comments, service_id, None, None, None, None, sort_by, format=format)
+
+@router.get('/business/{user_id}/stream')
+def stream_business_comments(
+    user_id: int,
+    format: str = Query("ndjson", regex="^(ndjson|json)$"),
+    type: Optional[str] = Query(None),
+    min_rating: Optional[int] = Query(None),
+    max_rating: Optional[int] = Query(None),
+    sort_by: Optional[str] = Query(None)
+):
+    return streaming_response(ReadSessionLocal, stream_comments, None, user_id, type, min_rating, max_rating, sort_by, format=format)
+
+@router.get('/business/{user_id}/stats', response_model=BusinessStats)
+async def get_business_stats(
+    user_id: int,
+    request: Request,
+    bucket: str = Query("week", regex="^(day|week|month)$"),
+    periods: int = Query(12, ge=1, le=366),
+    window_days: int = Query(30, ge=1, le=365),
+    run=Depends(get_db_runner)
+):
+    async def produce():
+        try:
+            return await run(business_stats, user_id, bucket, periods, window_days), {}
+        except Exception:
+            logging.exception(f"Failed to compute business stats for user {user_id}")
+            raise
+
+    return await response_cache.respond(request, business_tags(user_id), produce, BusinessStats)
 
 @router.get('/{service_id}', response_model=List[CommentSchema])
-def get_comments_by_service(service_id: int, db: Session = Depends(get_db)):
-    comments = db.query(CommentModel).filter(CommentModel.service_id == service_id).all()
-    if not comments:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No comments found for this service")
-    
-    comments_with_full_names = []
-    for comment in comments:
-        user = db.query(UserModel).filter(UserModel.id == comment.users_id).first()
-        comment_data = {
-            "title": comment.title,
-            "content": comment.content,
-            "rating": comment.rating,
-            "service_id": comment.service_id,
-            "users_id": comment.users_id,
-            "created_at": comment.created_at,
-            "full_name": user.full_name if user else None
-        }
-        comments_with_full_names.append(CommentSchema(**comment_data))
-    
-    return comments_with_full_names
+async def get_comments_by_service(
+    service_id: int,
+    request: Request,
+    sort_by: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    run=Depends(get_db_runner)
+):
+    async def produce():
+        comments, next_cursor = await run(list_service_comments, service_id, sort_by, limit, cursor)
+        if not comments and not cursor:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No comments found for this service")
+        return comments, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+
+    return await response_cache.respond(request, (f'comments:{service_id}',), produce)
+
+def comment_insert(db: Session, rows):
+    dialect = postgresql if db.get_bind().dialect.name == 'postgresql' else sqlite
+    statement = dialect.insert(CommentModel).values(rows).on_conflict_do_nothing(index_elements=['service_id', 'users_id'])
+    inserted = db.execute(statement.returning(CommentModel.service_id, CommentModel.users_id, CommentModel.created_at)).all()
+    return {(service_id, users_id): created_at for service_id, users_id, created_at in inserted}
+
+def existing_reviews(db: Session, keys):
+    rows = comment_query(db).add_columns(CommentModel.idempotency_key).filter(
+        tuple_(CommentModel.service_id, CommentModel.users_id).in_(keys)
+    ).all()
+    return {(row.service_id, row.users_id): row for row in rows}
+
+def review_author(db: Session, service_id: int, users_id: int):
+    full_name, found_service_id = db.execute(select(
+        select(UserModel.full_name).where(UserModel.id == users_id).scalar_subquery(),
+        select(ServiceModel.id).where(ServiceModel.id == service_id).scalar_subquery(),
+    )).one()
+    if found_service_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
+    if full_name is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return full_name
+
+def add_comment(db: Session, comment: CommentCreate, idempotency_key: Optional[str] = None):
+    row = {field: getattr(comment, field) for field in REVIEW_FIELDS}
+    key = (comment.service_id, comment.users_id)
+    full_name = review_author(db, comment.service_id, comment.users_id)
+    created = comment_insert(db, [dict(row, idempotency_key=idempotency_key)])
+
+    if key not in created:
+        existing = existing_reviews(db, [key]).get(key)
+        if idempotency_key is None or existing is None or existing.idempotency_key != idempotency_key:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User has already commented on this service")
+        return dict(zip(COMMENT_KEYS, existing))
+
+    apply_rating(db, comment.service_id, comment.rating)
+    enqueue(db, 'invalidate_reviews', {'service_ids': [comment.service_id]})
+    db.commit()
+    return dict(row, created_at=created[key], full_name=full_name)
 
 @router.post('/', response_model=CommentSchema)
-def create_comment(comment: CommentCreate, db: Session = Depends(get_db)):
-    existing_comment = db.query(CommentModel).filter(
-        CommentModel.service_id == comment.service_id,
-        CommentModel.users_id == comment.users_id
+async def create_comment(
+    comment: CommentCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+    run=Depends(get_db_runner)
+):
+    return await run(add_comment, comment, idempotency_key)
+
+def known_ids(db: Session, model, ids):
+    return {row[0] for row in db.query(model.id).filter(model.id.in_(ids)).all()} if ids else set()
+
+def add_reviews(db: Session, batch: ReviewBatch):
+    service_ids = known_ids(db, ServiceModel, {review.service_id for review in batch.reviews})
+    user_ids = known_ids(db, UserModel, {review.users_id for review in batch.reviews})
+
+    results, rows, seen = [], {}, set()
+    for index, review in enumerate(batch.reviews):
+        key = (review.service_id, review.users_id)
+        result = {"index": index, "service_id": review.service_id, "users_id": review.users_id, "status": "pending"}
+        results.append(result)
+        if review.service_id not in service_ids:
+            result.update(status="invalid", detail="Service not found")
+        elif review.users_id not in user_ids:
+            result.update(status="invalid", detail="User not found")
+        elif key in seen:
+            result.update(status="duplicate", detail="Repeated in this batch")
+        else:
+            seen.add(key)
+            rows[key] = dict({field: getattr(review, field) for field in REVIEW_FIELDS}, idempotency_key=review.idempotency_key)
+
+    created = comment_insert(db, list(rows.values())) if rows else {}
+    conflicts = existing_reviews(db, [key for key in rows if key not in created]) if len(created) < len(rows) else {}
+    for result in results:
+        key = (result["service_id"], result["users_id"])
+        if result["status"] != "pending":
+            continue
+        if key in created:
+            result["status"] = "created"
+        elif conflicts.get(key) is not None and rows[key]["idempotency_key"] is not None \
+                and conflicts[key].idempotency_key == rows[key]["idempotency_key"]:
+            result["status"] = "replayed"
+        else:
+            result.update(status="conflict", detail="User has already commented on this service")
+
+    if created:
+        affected = sorted({service_id for service_id, _ in created})
+        rebuild_ratings(db, affected)
+        enqueue(db, 'invalidate_reviews', {'service_ids': affected})
+    db.commit()
+    return {"created": len(created), "results": results}
+
+@router.post('/batch', response_model=ReviewBatchResult)
+async def create_reviews(batch: ReviewBatch, principal: Principal = Depends(get_current_principal), run=Depends(get_db_runner)):
+    if principal.kind != 'admin':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can import reviews")
+    if len(batch.reviews) > MAX_REVIEW_BATCH:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_REVIEW_BATCH} reviews per request")
+    return await run(add_reviews, batch)
+
+def remove_comment(db: Session, service_id: int, users_id: int):
+    db_comment = db.query(CommentModel).filter(
+        CommentModel.service_id == service_id,
+        CommentModel.users_id == users_id
     ).first()
-    
-    if existing_comment:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User has already commented on this service")
-    
-    db_comment = CommentModel(
-        title=comment.title,
-        content=comment.content,
-        rating=comment.rating,
-        service_id=comment.service_id,
-        users_id=comment.users_id
-    )
-    db.add(db_comment)
+    if db_comment is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
+    rating = db_comment.rating
+    db.delete(db_comment)
+    db.flush()
+    apply_rating(db, service_id, rating, delta=-1)
+    enqueue(db, 'invalidate_reviews', {'service_ids': [service_id]})
     db.commit()
-    db.refresh(db_comment)
 
-    return CommentSchema.from_orm(db_comment)
+@router.delete('/{service_id}/{users_id}', status_code=status.HTTP_204_NO_CONTENT)
+async def delete_comment(
+    service_id: int,
+    users_id: int,
+    principal: Principal = Depends(get_current_principal),
+    run=Depends(get_db_runner)
+):
+    if principal.kind != 'admin' and (principal.kind != 'user' or principal.id != users_id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only the author or an admin can delete this comment")
+    await run(remove_comment, service_id, users_id)
+    return
 
 @router.get('/', response_model=List[CommentSchema])
-def get_comments(
+async def get_comments(
     type: Optional[str] = Query(None),
     min_rating: Optional[int] = Query(None),
     max_rating: Optional[int] = Query(None),
     sort_by: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    run=Depends(get_db_runner)
 ):
-    comments_query = db.query(CommentModel)
-
-    if type:
-        comments_query = comments_query.join(ServiceModel).filter(ServiceModel.type == type)
-    if min_rating is not None:
-        comments_query = comments_query.filter(CommentModel.rating >= min_rating)
-    if max_rating is not None:
-        comments_query = comments_query.filter(CommentModel.rating <= max_rating)
-    
-    if sort_by:
-        if sort_by == "rating_asc":
-            comments_query = comments_query.order_by(asc(CommentModel.rating))
-        elif sort_by == "rating_desc":
-            comments_query = comments_query.order_by(desc(CommentModel.rating))
-        elif sort_by == "created_at_asc":
-            comments_query = comments_query.order_by(asc(CommentModel.created_at))
-        elif sort_by == "created_at_desc":
-            comments_query = comments_query.order_by(desc(CommentModel.created_at))
-
-    comments = comments_query.all()
-    comments_with_full_names = []
-    for comment in comments:
-        user = db.query(UserModel).filter(UserModel.id == comment.users_id).first()
-        comment_data = {
-            "title": comment.title,
-            "content": comment.content,
-            "rating": comment.rating,
-            "service_id": comment.service_id,
-            "users_id": comment.users_id,
-            "created_at": comment.created_at,
-            "full_name": user.full_name if user else None
-        }
-        comments_with_full_names.append(CommentSchema(**comment_data))
-    
-    return comments_with_full_names
+    return comment_page_response(await run(list_comments, type, min_rating, max_rating, sort_by, limit, cursor))
 
 @router.get('/business/{user_id}', response_model=List[CommentSchema])
-def get_comments_by_business(
+async def get_comments_by_business(
     user_id: int,
     type: Optional[str] = Query(None),
     min_rating: Optional[int] = Query(None),
     max_rating: Optional[int] = Query(None),
     sort_by: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    run=Depends(get_db_runner)
 ):
     try:
-        own_services = db.query(OwnServiceModel).filter(OwnServiceModel.users_id == user_id).all()
-        service_ids = [own_service.service_id for own_service in own_services]
-        
-        comments_query = db.query(CommentModel).filter(CommentModel.service_id.in_(service_ids))
-
-        if type:
-            comments_query = comments_query.join(ServiceModel).filter(ServiceModel.type == type)
-        if min_rating is not None:
-            comments_query = comments_query.filter(CommentModel.rating >= min_rating)
-        if max_rating is not None:
-            comments_query = comments_query.filter(CommentModel.rating <= max_rating)
-        
-        if sort_by:
-            if sort_by == "rating_asc":
-                comments_query = comments_query.order_by(asc(CommentModel.rating))
-            elif sort_by == "rating_desc":
-                comments_query = comments_query.order_by(desc(CommentModel.rating))
-            elif sort_by == "created_at_asc":
-                comments_query = comments_query.order_by(asc(CommentModel.created_at))
-            elif sort_by == "created_at_desc":
-                comments_query = comments_query.order_by(desc(CommentModel.created_at))
-
-        comments = comments_query.all()
-        comments_with_full_names = []
-        for comment in comments:
-            user = db.query(UserModel).filter(UserModel.id == comment.users_id).first()
-            comment_data = {
-                "title": comment.title,
-                "content": comment.content,
-                "rating": comment.rating,
-                "service_id": comment.service_id,
-                "users_id": comment.users_id,
-                "created_at": comment.created_at,
-                "full_name": user.full_name if user else None
-            }
-            comments_with_full_names.append(CommentSchema(**comment_data))
-        
-        return comments_with_full_names
-    except Exception as e:
-        print("Error in get_comments:", e)
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch comments")
+        page = await run(list_business_comments, user_id, type, min_rating, max_rating, sort_by, limit, cursor)
+    except HTTPException:
+        raise
+    except Exception:
+        logging.exception(f"Failed to fetch comments for business {user_id}")
+        raise
+    return comment_page_response(page)
@@ -1,29 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from db import SessionLocal
+from db import get_db_runner
 from models.favorite import Favorite as FavoriteModel
-from schemas.favorite import FavoriteCreate, Favorite as FavoriteSchema
+from models.service import Service as ServiceModel
+from schemas.favorite import FavoriteCreate, FavoriteBulkToggle, FavoriteState
+from schemas.service import Service as ServiceSchema
+from core.principal import Principal
+from core.cache import service_tags
+from core.tasks import enqueue_invalidation
+from core.serialization import FastJSONResponse
+from .auth import get_current_principal
+from .service import SERVICE_COLUMNS, service_payloads
 
 router = APIRouter(
     prefix='/api/v1/favorite',
     tags=['Favorite']
 )
 
-def get_db():
-    db = SessionLocal()
+MAX_BULK_FAVORITES = 200
+
+def require_user(principal: Principal = Depends(get_current_principal)):
+    if principal.kind != 'user':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only users can save favorites")
+    return principal
+
+def adjust_favorite_count(db: Session, service_id: int, delta: int):
+    db.query(ServiceModel).filter(ServiceModel.id == service_id).update(
+        {'favorite_count': ServiceModel.favorite_count + delta}, synchronize_session=False
+    )
+
+def insert_favorite(db: Session, users_id: int, service_id: int):
     try:
-        yield db
-    finally:
-        db.close()
-
-@router.get('/', response_model=list[FavoriteSchema])
-def get_Favorites(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    Favorites = db.query(FavoriteModel).offset(skip).limit(limit).all()
-    return Favorites
-
-@router.get('/{Favorite_id}', response_model=FavoriteSchema)
-def get_Favorite(Favorite_id: int, db: Session = Depends(get_db)):
-    Favorite = db.query(FavoriteModel).filter(FavoriteModel.id == Favorite_id).first()
-    if Favorite is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Favorite not found")
-    return Favorite
+        with db.begin_nested():
+            db.add(FavoriteModel(users_id=users_id, service_id=service_id))
+            db.flush()
+    except IntegrityError:
+        return False
+    adjust_favorite_count(db, service_id, 1)
+    return True
+
+def delete_favorite(db: Session, users_id: int, service_id: int):
+    deleted = db.query(FavoriteModel).filter(
+        FavoriteModel.users_id == users_id,
+        FavoriteModel.service_id == service_id
+    ).delete(synchronize_session=False)
+    if deleted:
+        adjust_favorite_count(db, service_id, -1)
+    return bool(deleted)
+
+def favorite_states(db: Session, users_id: int, service_ids: List[int]):
+    rows = db.query(ServiceModel.id, ServiceModel.favorite_count).filter(ServiceModel.id.in_(service_ids)).all()
+    counts = {service_id: favorite_count for service_id, favorite_count in rows}
+    favorited = {row[0] for row in db.query(FavoriteModel.service_id).filter(
+        FavoriteModel.users_id == users_id,
+        FavoriteModel.service_id.in_(service_ids)
+    ).all()}
+    return [
+        {"service_id": service_id, "favorited": service_id in favorited, "favorite_count": counts[service_id]}
+        for service_id in service_ids if service_id in counts
+    ]
+
+def existing_service_ids(db: Session, service_ids: List[int]):
+    return {row[0] for row in db.query(ServiceModel.id).filter(ServiceModel.id.in_(service_ids)).all()}
+
+def add_favorite(db: Session, users_id: int, service_id: int):
+    if not existing_service_ids(db, [service_id]):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
+    if insert_favorite(db, users_id, service_id):
+        enqueue_invalidation(db, *service_tags(service_id))
+    db.commit()
+    return favorite_states(db, users_id, [service_id])[0]
+
+def remove_favorite(db: Session, users_id: int, service_id: int):
+    if delete_favorite(db, users_id, service_id):
+        enqueue_invalidation(db, *service_tags(service_id))
+    db.commit()
+    states = favorite_states(db, users_id, [service_id])
+    if not states:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
+    return states[0]
+
+def toggle_favorites(db: Session, users_id: int, service_ids: List[int]):
+    service_ids = list(dict.fromkeys(service_ids))
+    valid_ids = existing_service_ids(db, service_ids)
+    current = {row[0] for row in db.query(FavoriteModel.service_id).filter(
+        FavoriteModel.users_id == users_id,
+        FavoriteModel.service_id.in_(valid_ids)
+    ).all()}
+    for service_id in service_ids:
+        if service_id not in valid_ids:
+            continue
+        if service_id in current:
+            delete_favorite(db, users_id, service_id)
+        else:
+            insert_favorite(db, users_id, service_id)
+    enqueue_invalidation(db, 'services', *[f'service:{service_id}' for service_id in valid_ids])
+    db.commit()
+    return favorite_states(db, users_id, [service_id for service_id in service_ids if service_id in valid_ids])
+
+def list_favorite_services(db: Session, users_id: int, skip: int, limit: int):
+    rows = db.query(*SERVICE_COLUMNS).join(
+        FavoriteModel, FavoriteModel.service_id == ServiceModel.id
+    ).filter(FavoriteModel.users_id == users_id).order_by(ServiceModel.id.desc()).offset(skip).limit(limit).all()
+    return service_payloads(db, rows)
+
+@router.get('/', response_model=List[ServiceSchema])
+async def get_my_favorites(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    principal: Principal = Depends(require_user),
+    run=Depends(get_db_runner)
+):
+    return FastJSONResponse(await run(list_favorite_services, principal.id, skip, limit))
+
+@router.get('/users/{user_id}', response_model=List[ServiceSchema])
+async def get_user_favorites(
+    user_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    run=Depends(get_db_runner)
+):
+    return FastJSONResponse(await run(list_favorite_services, user_id, skip, limit))
+
+@router.get('/status', response_model=List[FavoriteState])
+async def get_favorite_status(
+    service_ids: List[int] = Query(...),
+    principal: Principal = Depends(require_user),
+    run=Depends(get_db_runner)
+):
+    if len(service_ids) > MAX_BULK_FAVORITES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_BULK_FAVORITES} services per request")
+    return await run(favorite_states, principal.id, list(dict.fromkeys(service_ids)))
+
+@router.post('/', response_model=FavoriteState)
+async def create_favorite(favorite: FavoriteCreate, principal: Principal = Depends(require_user), run=Depends(get_db_runner)):
+    return await run(add_favorite, principal.id, favorite.service_id)
+
+@router.delete('/{service_id}', response_model=FavoriteState)
+async def delete_favorite_endpoint(service_id: int, principal: Principal = Depends(require_user), run=Depends(get_db_runner)):
+    return await run(remove_favorite, principal.id, service_id)
+
+@router.post('/bulk', response_model=List[FavoriteState])
+async def bulk_toggle_favorites(toggle: FavoriteBulkToggle, principal: Principal = Depends(require_user), run=Depends(get_db_runner)):
+    if len(toggle.service_ids) > MAX_BULK_FAVORITES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_BULK_FAVORITES} services per request")
+    return await run(toggle_favorites, principal.id, toggle.service_ids)
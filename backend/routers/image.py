@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Request
+from core.image_serving import image_response
+
+router = APIRouter(
+    prefix='/res',
+    tags=['Image']
+)
+
+@router.api_route('/{filename}', methods=['GET', 'HEAD'])
+def get_resource(filename: str, request: Request):
+    return image_response(request, filename)
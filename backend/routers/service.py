@@ -1,174 +1,444 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from sqlalchemy import asc, desc, func
-from db import SessionLocal
+from sqlalchemy import asc, delete, desc, func, select
+from db import ReadSessionLocal, get_db, get_db_runner
 from fastapi.responses import FileResponse
 from models.service import Service as ServiceModel
 from models.user import User as UserModel
 from models.service_image import ServiceImage as ServiceImageModel
 from models.comment import Comment as CommentModel
 from models.own_service import OwnService as OwnServiceModel
-from schemas.service import Service as ServiceSchema, ServiceCreate, ServiceResponse
+from models.service_rating import ServiceRating as ServiceRatingModel
+from models.favorite import Favorite as FavoriteModel
+from models.recommendation import ServiceSimilarity as ServiceSimilarityModel, UserRecommendation as UserRecommendationModel
+from models.catalog_import import CatalogImport as CatalogImportModel, CatalogImportError as CatalogImportErrorModel
+from schemas.service import Service as ServiceSchema, ServiceCreate, ServiceResponse, NearbyService, ScoredService, ServiceBulkDelete, ServiceBulkDeleteResult
 from schemas.service_image import ServiceImage as ServiceImageSchema
-from .auth import get_current_user
-import uuid
-from pathlib import Path
+from schemas.catalog_import import CatalogImport as CatalogImportSchema
+from core.ratings import fetch_ratings, rating_payload
+from core.analytics import service_owner_ids
+from core.recommendations import recommendation_store
+from core.pagination import CountCache, paginate
+from core.search import apply_search
+from core.nearby import nearest_services, services_within
+from core.images import UPLOAD_DIR, local_image_filename, save_upload, variant_url
+from core.image_serving import image_response
+from core.principal import Principal
+from core.cache import business_tags, response_cache, service_tags
+from core.streaming import STREAM_BATCH_SIZE, streaming_response
+from core.serialization import FastJSONResponse, dumps, rows_to_dicts
+from core.ingest import create_import, import_format, is_resumable, run_import, save_import_file
+from core.jobs import enqueue, job_handler
+from core.tasks import enqueue_invalidation
+from .auth import get_current_principal
+from decouple import config
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter(
     prefix='/api/v1/service',
     tags=['Service']
 )
 
-UPLOAD_DIR = Path('res')
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+IMAGE_HOST = config('IMAGE_HOST', default='http://localhost:8000')
+MAX_BULK_DELETE = config('MAX_BULK_DELETE', default=500, cast=int)
+IMAGE_BATCH_SIZE = 1000
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+service_count_cache = CountCache(ttl=config('SERVICE_COUNT_TTL', default=60, cast=float))
+
+def fetch_image_urls(db: Session, service_ids: List[int]):
+    image_urls = {service_id: [] for service_id in service_ids}
+    ids = list(image_urls)
+    for start in range(0, len(ids), IMAGE_BATCH_SIZE):
+        rows = db.query(ServiceImageModel.service_id, ServiceImageModel.image_url).filter(
+            ServiceImageModel.service_id.in_(ids[start:start + IMAGE_BATCH_SIZE])
+        ).all()
+        for service_id, url in rows:
+            image_urls[service_id].append(url)
+    return image_urls
+
+def public_url(url: str):
+    return url if url.startswith(('http://', 'https://')) else f"{IMAGE_HOST}{url}"
+
+SERVICE_COLUMNS = (
+    ServiceModel.id, ServiceModel.name, ServiceModel.address, ServiceModel.geolocation, ServiceModel.website,
+    ServiceModel.type, ServiceModel.description, ServiceModel.email, ServiceModel.phone, ServiceModel.created_at,
+    ServiceModel.favorite_count,
+)
+SERVICE_KEYS = tuple(column.key for column in SERVICE_COLUMNS)
 
-def fetch_image_urls(db: Session, service_id: int):
-    return [url[0] for url in db.query(ServiceImageModel.image_url).filter(ServiceImageModel.service_id == service_id).all()]
+def service_row(service):
+    return tuple(getattr(service, key) for key in SERVICE_KEYS)
 
-def apply_sorting(query, sort_by, db):
+def service_payloads(db: Session, rows):
+    services = rows_to_dicts(rows, SERVICE_KEYS)
+    service_ids = [service['id'] for service in services]
+    image_urls = fetch_image_urls(db, service_ids)
+    ratings = fetch_ratings(db, service_ids)
+    for service in services:
+        urls = image_urls[service['id']]
+        service['image_urls'] = [public_url(url) for url in urls]
+        service['thumbnail_urls'] = [public_url(variant_url(url, 'thumb')) for url in urls]
+        service['card_image_urls'] = [public_url(variant_url(url, 'card')) for url in urls]
+        service.update(rating_payload(ratings.get(service['id'])))
+    return services
+
+def service_ordering(sort_by):
     if sort_by == "rating_asc":
-        subquery = db.query(
-            CommentModel.service_id,
-            func.avg(CommentModel.rating).label('average_rating')
-        ).group_by(CommentModel.service_id).subquery()
-        query = query.outerjoin(subquery, ServiceModel.id == subquery.c.service_id).order_by(asc(subquery.c.average_rating))
+        return [(func.coalesce(ServiceRatingModel.average_rating, 6.0), False), (ServiceModel.id, False)]
     elif sort_by == "rating_desc":
-        subquery = db.query(
-            CommentModel.service_id,
-            func.avg(CommentModel.rating).label('average_rating')
-        ).group_by(CommentModel.service_id).subquery()
-        query = query.outerjoin(subquery, ServiceModel.id == subquery.c.service_id).order_by(desc(subquery.c.average_rating))
+        return [(func.coalesce(ServiceRatingModel.average_rating, -1.0), True), (ServiceModel.id, True)]
     elif sort_by == "created_at_asc":
-        query = query.order_by(asc(ServiceModel.created_at))
+        return [(ServiceModel.created_at, False), (ServiceModel.id, False)]
     elif sort_by == "created_at_desc":
-        query = query.order_by(desc(ServiceModel.created_at))
-    return query
+        return [(ServiceModel.created_at, True), (ServiceModel.id, True)]
+    elif sort_by == "favorites_desc":
+        return [(ServiceModel.favorite_count, True), (ServiceModel.id, True)]
+    return [(ServiceModel.id, False)]
 
-@router.post('/create', response_model=ServiceSchema)
-def create_service(service: ServiceCreate, request: Request, db: Session = Depends(get_db)):
-    user_name = get_current_user(request)
-    user = db.query(UserModel).filter(UserModel.user_name == user_name).first()
+def apply_sorting(query, sort_by, rank=None):
+    if sort_by in ("rating_asc", "rating_desc"):
+        query = query.outerjoin(ServiceRatingModel, ServiceModel.id == ServiceRatingModel.service_id)
+    if sort_by is None and rank is not None:
+        return query, [(rank, True), (ServiceModel.id, False)]
+    return query, service_ordering(sort_by)
 
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
-
-    service_data = service.dict(exclude={'main_image_url', 'image_urls', 'average_rating'})
+def add_service(db: Session, service: ServiceCreate, owner_id: int):
+    service_data = service.dict(exclude={'main_image_url', 'image_urls', 'average_rating', 'rating_count', 'rating_histogram', 'favorite_count'})
     db_service = ServiceModel(**service_data)
     db.add(db_service)
-    db.commit()
-    db.refresh(db_service)
-    
-    db_own_service = OwnServiceModel(users_id=user.id, service_id=db_service.id)
+    db.flush()
+
+    db_own_service = OwnServiceModel(users_id=owner_id, service_id=db_service.id)
     db.add(db_own_service)
+    db.add(ServiceRatingModel(service_id=db_service.id))
+    enqueue_invalidation(db, 'services', *business_tags(owner_id))
     db.commit()
+    db.refresh(db_service)
     return db_service
 
-@router.post('/{service_id}/images', response_model=ServiceImageSchema)
-async def create_service_image(service_id: int, file: UploadFile = File(...), db: Session = Depends(get_db)):
+@router.post('/create', response_model=ServiceSchema)
+async def create_service(service: ServiceCreate, principal: Principal = Depends(get_current_principal), run=Depends(get_db_runner)):
+    if principal.kind != 'user':
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
+
+    db_service = await run(add_service, service, principal.id)
+    service_count_cache.clear()
+    return db_service
+
+def service_exists(db: Session, service_id: int):
+    return db.query(ServiceModel.id).filter(ServiceModel.id == service_id).first() is not None
+
+def add_service_image(db: Session, service_id: int, filename: str):
     db_service = db.query(ServiceModel).filter(ServiceModel.id == service_id).first()
     if db_service is None:
+        return None
+    image_url = f'/api/v1/service/images/{filename}'
+    db_image = ServiceImageModel(service_id=service_id, image_url=image_url)
+    db.add(db_image)
+    enqueue(db, 'image_variants', {'filename': filename})
+    enqueue_invalidation(db, *service_tags(service_id))
+    db.commit()
+    return image_url
+
+@router.post('/{service_id}/images', response_model=ServiceImageSchema)
+async def create_service_image(service_id: int, file: UploadFile = File(...), run=Depends(get_db_runner)):
+    if not await run(service_exists, service_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
 
-    file_extension = file.filename.split('.')[-1]
-    new_filename = f"{uuid.uuid4()}.{file_extension}"
-    file_path = UPLOAD_DIR / new_filename
+    filename = await save_upload(file)
+    image_url = await run(add_service_image, service_id, filename)
+    if image_url is None:
+        await run_in_threadpool((UPLOAD_DIR / filename).unlink, True)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
+    return {
+        "service_id": service_id,
+        "image_url": f"{IMAGE_HOST}{image_url}",
+        "thumbnail_url": f"{IMAGE_HOST}{variant_url(image_url, 'thumb')}",
+        "card_image_url": f"{IMAGE_HOST}{variant_url(image_url, 'card')}",
+        "full_image_url": f"{IMAGE_HOST}{variant_url(image_url, 'full')}",
+    }
 
-    with file_path.open('wb') as f:
-        f.write(await file.read())
-    image_url = f'/api/v1/service/images/{new_filename}'
-    db_image = ServiceImageModel(service_id=service_id, image_url=image_url)
-    db.add(db_image)
+@job_handler('catalog_import')
+def process_import(db: Session, payload):
+    run_import(db, payload['import_id'])
+    service_count_cache.clear()
+    enqueue_invalidation(db, 'services')
+    db.commit()
+
+def start_import(db: Session, owner_id: int, file_path, file_format: str):
+    job = create_import(db, owner_id, file_path, file_format)
+    enqueue(db, 'catalog_import', {'import_id': job.id})
+    db.commit()
+    return import_payload(job)
+
+def load_import(db: Session, import_id: int, principal: Principal, error_offset: int = 0, error_limit: int = 100):
+    job = db.get(CatalogImportModel, import_id)
+    if job is None or (principal.kind != 'admin' and job.owner_id != principal.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+    errors = db.query(CatalogImportErrorModel).filter(
+        CatalogImportErrorModel.import_id == import_id
+    ).order_by(CatalogImportErrorModel.row_number).offset(error_offset).limit(error_limit).all()
+    return import_payload(job, errors)
+
+def import_payload(job: CatalogImportModel, errors=()):
+    payload = {column.name: getattr(job, column.name) for column in CatalogImportModel.__table__.columns}
+    payload["errors"] = [{"row_number": error.row_number, "error": error.error} for error in errors]
+    return payload
+
+@router.post('/import', response_model=CatalogImportSchema, status_code=status.HTTP_202_ACCEPTED)
+async def import_services(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, regex="^(ndjson|jsonl|csv)$"),
+    principal: Principal = Depends(get_current_principal),
+    run=Depends(get_db_runner)
+):
+    if principal.kind != 'user':
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not authenticated")
+    file_format = import_format(file.filename, format)
+    file_path = await save_import_file(file, file_format)
+    return await run(start_import, principal.id, file_path, file_format)
+
+@router.get('/import/{import_id}', response_model=CatalogImportSchema)
+async def get_import(
+    import_id: int,
+    error_offset: int = Query(0, ge=0),
+    error_limit: int = Query(100, ge=1, le=1000),
+    principal: Principal = Depends(get_current_principal),
+    run=Depends(get_db_runner)
+):
+    return await run(load_import, import_id, principal, error_offset, error_limit)
+
+def resume_import_job(db: Session, import_id: int):
+    if not is_resumable(db, import_id):
+        return False
+    enqueue(db, 'catalog_import', {'import_id': import_id})
     db.commit()
-    db.refresh(db_image)
-    return db_image
+    return True
+
+@router.post('/import/{import_id}/resume', response_model=CatalogImportSchema, status_code=status.HTTP_202_ACCEPTED)
+async def resume_import(
+    import_id: int,
+    principal: Principal = Depends(get_current_principal),
+    run=Depends(get_db_runner)
+):
+    job = await run(load_import, import_id, principal, 0, 0)
+    if not await run(resume_import_job, import_id):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Only failed or interrupted imports can be resumed; this one is {job['status']}")
+    return job
+
+def list_services(db: Session, page, limit, search, type, sort_by, cursor, count):
+    query = db.query(*SERVICE_COLUMNS)
+    rank = None
+    if search:
+        query, rank = apply_search(query, db, search)
+    if type and type != "all":
+        query = query.filter(ServiceModel.type == type) 
+
+    total = None
+    if count == "exact":
+        total = query.count()
+    elif count == "estimate":
+        total = service_count_cache.get_or_compute((search, type), query.count)
+
+    query, ordering = apply_sorting(query, sort_by, rank)
+    rows, next_cursor = paginate(query, ordering, limit, cursor, offset=(page - 1) * limit)
+    services = service_payloads(db, rows)
+    return {"services": services, "total": total, "next_cursor": next_cursor, "total_estimated": count == "estimate"}
 
 @router.get('/', response_model=ServiceResponse)
-def get_services(
+async def get_services(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(8, le=100),
     search: Optional[str] = None,
     type: Optional[str] = None,
-    sort_by: Optional[str] = Query(None, regex="^(rating_asc|rating_desc|created_at_asc|created_at_desc)$"),
-    db: Session = Depends(get_db)
+    sort_by: Optional[str] = Query(None, regex="^(rating_asc|rating_desc|created_at_asc|created_at_desc|favorites_desc)$"),
+    cursor: Optional[str] = None,
+    count: str = Query("exact", regex="^(exact|estimate|none)$"),
+    run=Depends(get_db_runner)
 ):
-    try:
-        query = db.query(ServiceModel)
-        if search:
-            query = query.filter(ServiceModel.name.ilike(f'%{search}%'))
-        if type and type != "all":
-            query = query.filter(ServiceModel.type == type) 
-        query = apply_sorting(query, sort_by, db)
-        total = query.count()
-        services = query.offset((page - 1) * limit).limit(limit).all()
-        for service in services:
-            image_urls = fetch_image_urls(db, service.id)
-            service.image_urls = [f"http://localhost:8000{url}" for url in image_urls]
+    async def produce():
+        return await run(list_services, page, limit, search, type, sort_by, cursor, count), {}
 
-        return {"services": services, "total": total}
+    try:
+        return await response_cache.respond(request, ('services',), produce)
+    except HTTPException:
+        raise
     except Exception as e:
         print("Error in get_services:", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
+def list_all_services(db: Session):
+    return service_payloads(db, db.query(*SERVICE_COLUMNS).all())
+
 @router.get('/all', response_model=List[ServiceSchema])
-def get_all_services(db: Session = Depends(get_db)):
+async def get_all_services(run=Depends(get_db_runner)):
     try:
-        services = db.query(ServiceModel).all()
-        for service in services:
-            image_urls = fetch_image_urls(db, service.id)
-            service.image_urls = [f"http://localhost:8000{url}" for url in image_urls]
-
-        return services
+        return FastJSONResponse(await run(list_all_services))
     except Exception as e:
         print("Error in get_all_services:", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
+def average_ratings(db: Session, service_ids: List[int]):
+    averages = {}
+    for start in range(0, len(service_ids), IMAGE_BATCH_SIZE):
+        averages.update(db.query(ServiceRatingModel.service_id, ServiceRatingModel.average_rating).filter(
+            ServiceRatingModel.service_id.in_(service_ids[start:start + IMAGE_BATCH_SIZE])
+        ).all())
+    return averages
+
+def list_nearby_services(db: Session, lat, lon, radius_km, k, limit, type, sort_by):
+    if k:
+        results = nearest_services(db, lat, lon, k, radius_km, type)
+    else:
+        results = services_within(db, lat, lon, radius_km, type)
+        if sort_by in ("rating_asc", "rating_desc"):
+            averages = average_ratings(db, [service.id for _, service in results])
+            sign = -1 if sort_by == "rating_desc" else 1
+            results.sort(key=lambda candidate: (
+                averages.get(candidate[1].id) is None, sign * (averages.get(candidate[1].id) or 0), candidate[0]
+            ))
+        results = results[:limit]
+    services = service_payloads(db, [service_row(service) for _, service in results])
+    for service, (distance, model) in zip(services, results):
+        service.update(latitude=model.latitude, longitude=model.longitude, distance_km=round(distance, 3))
+    return services
+
+def stream_services(db: Session, type: Optional[str]):
+    statement = select(*SERVICE_COLUMNS).order_by(ServiceModel.id).execution_options(yield_per=STREAM_BATCH_SIZE)
+    if type and type != "all":
+        statement = statement.where(ServiceModel.type == type)
+    for partition in db.execute(statement).partitions():
+        for service in service_payloads(db, partition):
+            yield dumps(service)
+
+@router.get('/all/stream')
+def stream_all_services(
+    format: str = Query("ndjson", regex="^(ndjson|json)$"),
+    type: Optional[str] = None
+):
+    return streaming_response(ReadSessionLocal, stream_services, type, format=format)
+
+@router.get('/nearby', response_model=List[NearbyService])
+async def get_nearby_services(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5, gt=0, le=100),
+    k: Optional[int] = Query(None, ge=1, le=100),
+    limit: int = Query(50, ge=1, le=200),
+    type: Optional[str] = None,
+    sort_by: Optional[str] = Query(None, regex="^(distance|rating_asc|rating_desc)$"),
+    run=Depends(get_db_runner)
+):
+    if k and sort_by in ("rating_asc", "rating_desc"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Rating sort is not supported together with k")
+    try:
+        services = await run(list_nearby_services, lat, lon, radius_km, k, limit, type, sort_by)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return FastJSONResponse(services)
+
+SERVICE_DEPENDENTS = (
+    ServiceImageModel.service_id,
+    OwnServiceModel.service_id,
+    CommentModel.service_id,
+    FavoriteModel.service_id,
+    ServiceRatingModel.service_id,
+    ServiceSimilarityModel.service_id,
+    ServiceSimilarityModel.similar_service_id,
+    UserRecommendationModel.service_id,
+)
+
+def delete_services(db: Session, service_ids: List[int]):
+    service_ids = sorted(row[0] for row in db.query(ServiceModel.id).filter(ServiceModel.id.in_(service_ids)).all())
+    if not service_ids:
+        return service_ids
+    owner_ids = service_owner_ids(db, *service_ids)
+    image_urls = [row[0] for row in db.query(ServiceImageModel.image_url).filter(ServiceImageModel.service_id.in_(service_ids)).all()]
+    for column in (*SERVICE_DEPENDENTS, ServiceModel.id):
+        db.execute(delete(column.class_).where(column.in_(service_ids)).execution_options(synchronize_session=False))
+
+    filenames = [filename for filename in map(local_image_filename, image_urls) if filename]
+    if filenames:
+        enqueue(db, 'delete_files', {'filenames': filenames})
+    tags = [tag for service_id in service_ids for tag in (f'service:{service_id}', f'comments:{service_id}')]
+    enqueue_invalidation(db, 'services', *tags, *business_tags(*owner_ids))
+    db.commit()
+    return service_ids
+
 @router.delete('/{service_id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_service(service_id: int, db: Session = Depends(get_db)):
-    db_service = db.query(ServiceModel).filter(ServiceModel.id == service_id).first()
-    if db_service is None:
+async def delete_service(service_id: int, run=Depends(get_db_runner)):
+    if not await run(delete_services, [service_id]):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
-    db.query(ServiceImageModel).filter(ServiceImageModel.service_id == service_id).delete(synchronize_session=False)
-    db.delete(db_service)
-    db.commit()
+    service_count_cache.clear()
     return
 
+@router.post('/bulk_delete', response_model=ServiceBulkDeleteResult)
+async def bulk_delete_services(
+    bulk: ServiceBulkDelete,
+    principal: Principal = Depends(get_current_principal),
+    run=Depends(get_db_runner)
+):
+    if principal.kind != 'admin':
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only admins can bulk delete services")
+    service_ids = list(dict.fromkeys(bulk.service_ids))
+    if len(service_ids) > MAX_BULK_DELETE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"At most {MAX_BULK_DELETE} services per request")
+    deleted = await run(delete_services, service_ids) if service_ids else []
+    if deleted:
+        service_count_cache.clear()
+    deleted_ids = set(deleted)
+    return {"deleted": deleted, "missing": [service_id for service_id in service_ids if service_id not in deleted_ids]}
+
+def list_my_services(db: Session, user_id: int):
+    rows = db.query(*SERVICE_COLUMNS).join(
+        OwnServiceModel, OwnServiceModel.service_id == ServiceModel.id
+    ).filter(OwnServiceModel.users_id == user_id).all()
+    return service_payloads(db, rows)
+
 @router.get('/my_services', response_model=List[ServiceSchema])
-def get_my_services(user_id: int = Query(...), db: Session = Depends(get_db)):
+async def get_my_services(user_id: int = Query(...), run=Depends(get_db_runner)):
     try:
-        own_services = db.query(OwnServiceModel).filter(OwnServiceModel.users_id == user_id).all()
-        service_ids = [own_service.service_id for own_service in own_services]
-        services = db.query(ServiceModel).filter(ServiceModel.id.in_(service_ids)).all()
-        for service in services:
-            image_urls = fetch_image_urls(db, service.id)
-            service.image_urls = [f"http://localhost:8000{url}" for url in image_urls]
-
-        return services
+        return FastJSONResponse(await run(list_my_services, user_id))
     except Exception as e:
         print("Error in get_my_services:", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch services")
 
+def scored_payloads(db: Session, matches):
+    if not matches:
+        return []
+    rows = db.query(*SERVICE_COLUMNS).filter(ServiceModel.id.in_([service_id for service_id, _ in matches])).all()
+    services = {service['id']: service for service in service_payloads(db, rows)}
+    return [
+        {**services[service_id], "score": round(score, 4) if score is not None else None}
+        for service_id, score in matches if service_id in services
+    ]
+
+def list_similar_services(db: Session, service_id: int, limit: int):
+    recommendation_store.ensure_loaded(db)
+    return scored_payloads(db, recommendation_store.similar_to(service_id, limit))
+
+@router.get('/{service_id}/similar', response_model=List[ScoredService])
+async def get_similar_services(service_id: int, limit: int = Query(10, ge=1, le=50), run=Depends(get_db_runner)):
+    return FastJSONResponse(await run(list_similar_services, service_id, limit))
+
+def load_service(db: Session, service_id: int):
+    row = db.query(*SERVICE_COLUMNS).filter(ServiceModel.id == service_id).first()
+    if row is None:
+        return None
+    return service_payloads(db, [row])[0]
+
 @router.get('/{service_id}', response_model=ServiceSchema)
-def get_service(service_id: int, db: Session = Depends(get_db)):
-    service = db.query(ServiceModel).filter(ServiceModel.id == service_id).first()
-    if service is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
-    
-    image_urls = fetch_image_urls(db, service_id)
-    service.image_urls = [f"http://localhost:8000{url}" for url in image_urls]
-    return service
-
-@router.get('/images/{filename}', response_class=FileResponse)
-def get_image(filename: str):
-    file_path = UPLOAD_DIR / f"{filename}"
-    if file_path.exists():
-        return FileResponse(file_path)
-    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+async def get_service(service_id: int, request: Request, run=Depends(get_db_runner)):
+    async def produce():
+        service = await run(load_service, service_id)
+        if service is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
+        return service, {}
+
+    return await response_cache.respond(request, (f'service:{service_id}',), produce)
 
+@router.api_route('/images/{filename}', methods=['GET', 'HEAD'])
+def get_image(filename: str, request: Request):
+    return image_response(request, filename)
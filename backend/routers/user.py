@@ -1,22 +1,27 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from db import SessionLocal
+from db import get_db, get_db_runner
 from models.user import User as UserModel
+from models.comment import Comment as CommentModel
+from models.favorite import Favorite as FavoriteModel
+from models.own_service import OwnService as OwnServiceModel
+from models.service import Service as ServiceModel
+from core.jobs import enqueue
+from core.tasks import enqueue_invalidation
+from core.passwords import hash_password_sync
+from core.principal import principal_cache
+from core.recommendations import recommendation_store
+from core.serialization import FastJSONResponse
 from schemas.user import UserCreate, User as UserSchema
+from schemas.service import ScoredService
+from .service import scored_payloads
 
 router = APIRouter(
     prefix='/api/v1/user',
     tags=['User']
 )
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get('/get', response_model=List[UserSchema])
 def get_users(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
     users = db.query(UserModel).offset(skip).limit(limit).all()
@@ -29,18 +34,27 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
 
+def list_recommendations(db: Session, user_id: int, limit: int):
+    recommendation_store.ensure_loaded(db)
+    return scored_payloads(db, recommendation_store.recommended_for(user_id, limit))
+
+@router.get('/{user_id}/recommendations', response_model=List[ScoredService])
+async def get_recommendations(user_id: int, limit: int = Query(10, ge=1, le=50), run=Depends(get_db_runner)):
+    return FastJSONResponse(await run(list_recommendations, user_id, limit))
+
 @router.put('/{user_id}', response_model=UserSchema)
 def update_user(user_id: int, user: UserCreate, db: Session = Depends(get_db)):
     db_user = db.query(UserModel).filter(UserModel.id == user_id).first()
     if db_user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    for key, value in user.dict(exclude={'password'}).items():
+    for key, value in user.dict(exclude={'password', 'confirmPassword'}).items():
         setattr(db_user, key, value)
     if user.password:
-        db_user.password = user.password
+        db_user.password = hash_password_sync(user.password)
 
     db.commit()
     db.refresh(db_user)
+    principal_cache.invalidate('user', user_id)
     return db_user
 
 @router.delete('/{user_id}', response_model=UserSchema)
@@ -48,6 +62,20 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     db_user = db.query(UserModel).filter(UserModel.id == user_id).first()
     if db_user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    rated_service_ids = [row[0] for row in db.query(CommentModel.service_id).filter(CommentModel.users_id == user_id).all()]
+    db.query(CommentModel).filter(CommentModel.users_id == user_id).delete(synchronize_session=False)
+    favorite_service_ids = [row[0] for row in db.query(FavoriteModel.service_id).filter(FavoriteModel.users_id == user_id).all()]
+    if favorite_service_ids:
+        db.query(ServiceModel).filter(ServiceModel.id.in_(favorite_service_ids)).update(
+            {'favorite_count': ServiceModel.favorite_count - 1}, synchronize_session=False
+        )
+        db.query(FavoriteModel).filter(FavoriteModel.users_id == user_id).delete(synchronize_session=False)
+    db.query(OwnServiceModel).filter(OwnServiceModel.users_id == user_id).delete(synchronize_session=False)
     db.delete(db_user)
+    if rated_service_ids:
+        enqueue(db, 'rebuild_ratings', {'service_ids': rated_service_ids})
+    if favorite_service_ids:
+        enqueue_invalidation(db, 'services', *[f'service:{service_id}' for service_id in favorite_service_ids])
     db.commit()
+    principal_cache.invalidate('user', user_id)
     return db_user
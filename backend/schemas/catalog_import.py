@@ -0,0 +1,26 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import List, Optional
+
+class CatalogImportRowError(BaseModel):
+    row_number: int
+    error: str
+
+    class Config:
+        from_attributes = True
+
+class CatalogImport(BaseModel):
+    id: int
+    owner_id: int
+    format: str
+    status: str
+    processed_rows: int
+    inserted_rows: int
+    error_count: int
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    errors: List[CatalogImportRowError] = []
+
+    class Config:
+        from_attributes = True
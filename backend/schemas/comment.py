@@ -1,6 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class CommentBase(BaseModel):
     title: str
@@ -17,6 +17,23 @@ class CommentCreate(CommentBase):
     service_id: int
     users_id: int
 
+class ReviewBatchItem(CommentCreate):
+    idempotency_key: Optional[str] = Field(None, max_length=64)
+
+class ReviewBatch(BaseModel):
+    reviews: List[ReviewBatchItem]
+
+class ReviewResult(BaseModel):
+    index: int
+    service_id: int
+    users_id: int
+    status: str
+    detail: Optional[str] = None
+
+class ReviewBatchResult(BaseModel):
+    created: int
+    results: List[ReviewResult]
+
 class Comment(CommentBase):
     service_id: int
     users_id: int
@@ -25,3 +42,33 @@ class Comment(CommentBase):
 
     class Config:
         from_attributes = True
+
+class RatingSummary(BaseModel):
+    rating_count: int
+    average_rating: Optional[float] = None
+    rating_histogram: List[int]
+
+class ServiceRatingStats(RatingSummary):
+    service_id: int
+    name: str
+
+class ReviewBucket(BaseModel):
+    bucket: str
+    review_count: int
+    average_rating: Optional[float] = None
+
+class ReviewTrend(BaseModel):
+    window_days: int
+    recent_count: int
+    previous_count: int
+    count_delta: int
+    recent_average: Optional[float] = None
+    previous_average: Optional[float] = None
+    average_delta: Optional[float] = None
+
+class BusinessStats(BaseModel):
+    user_id: int
+    services: List[ServiceRatingStats]
+    overall: RatingSummary
+    timeline: List[ReviewBucket]
+    trend: ReviewTrend
@@ -1,10 +1,19 @@
 from pydantic import BaseModel
+from typing import List
 
 class FavoriteCreate(BaseModel):
-    pass
+    service_id: int
+
+class FavoriteBulkToggle(BaseModel):
+    service_ids: List[int]
+
+class FavoriteState(BaseModel):
+    service_id: int
+    favorited: bool
+    favorite_count: int = 0
 
 class Favorite(BaseModel):
-    user_id: int
+    users_id: int
     service_id: int
 
     class Config:
@@ -12,16 +12,25 @@ class ServiceBase(BaseModel):
     description: Optional[str] = None
     email: Optional[str] = None
     image_urls: Optional[List[str]] = None
+    thumbnail_urls: List[str] = []
+    card_image_urls: List[str] = []
     phone: Optional[str] = None
     created_at: Optional[datetime] = None
     average_rating: Optional[float] = None
+    rating_count: int = 0
+    rating_histogram: List[int] = [0, 0, 0, 0, 0]
+    favorite_count: int = 0
 
 
 class Service(ServiceBase):
     id: Optional[int] = None 
     created_at: Optional[datetime] = None
     image_urls: List[str] = []
+    thumbnail_urls: List[str] = []
+    card_image_urls: List[str] = []
     average_rating: Optional[float] = None
+    rating_count: int = 0
+    rating_histogram: List[int] = [0, 0, 0, 0, 0]
 
     class Config:
         from_attributes = True
@@ -36,9 +45,19 @@ class ServiceCreate(BaseModel):
     email: str
     phone: str
 
+class NearbyService(Service):
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    distance_km: float
+
+class ScoredService(Service):
+    score: Optional[float] = None
+
 class ServiceResponse(BaseModel):
     services: List[ServiceBase]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+    total_estimated: bool = False
 
 class ServiceCreate(BaseModel):
     name: str
@@ -48,4 +67,11 @@ class ServiceCreate(BaseModel):
     type: str
     description: str
     email: str
-    phone: str
\ No newline at end of file
+    phone: str
+
+class ServiceBulkDelete(BaseModel):
+    service_ids: List[int]
+
+class ServiceBulkDeleteResult(BaseModel):
+    deleted: List[int]
+    missing: List[int]
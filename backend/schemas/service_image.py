@@ -1,10 +1,15 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class ServiceImageCreate(BaseModel):
     image_url : str
 
 class ServiceImage(BaseModel):
     service_id: int
+    image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    card_image_url: Optional[str] = None
+    full_image_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,24 @@
+import argparse
+import json
+import time
+from db import SessionLocal
+import models
+from core.similarity import SIMILARITY_TOP_K, rebuild_recommendations
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the top-K similar-service and user recommendation tables')
+    parser.add_argument('--top-k', type=int, default=SIMILARITY_TOP_K)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        summary = rebuild_recommendations(db, args.top_k)
+        db.commit()
+    finally:
+        db.close()
+    summary["elapsed_s"] = round(time.perf_counter() - started, 2)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == '__main__':
+    main()
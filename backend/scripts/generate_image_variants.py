@@ -0,0 +1,29 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core.images import ALLOWED_IMAGE_TYPES, IMAGE_VARIANTS, THUMBNAIL_WORKERS, UPLOAD_DIR, render_variants, variant_filename
+
+def pending_originals():
+    for path in sorted(UPLOAD_DIR.iterdir()):
+        extension = path.suffix.lstrip('.').lower()
+        if not path.is_file() or path.name.startswith('.') or extension not in ALLOWED_IMAGE_TYPES:
+            continue
+        if any(path.stem.endswith(f'_{variant}') for variant in IMAGE_VARIANTS):
+            continue
+        if all((UPLOAD_DIR / variant_filename(path.name, variant)).exists() for variant in IMAGE_VARIANTS):
+            continue
+        yield path
+
+def main():
+    generated = failed = 0
+    with ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS) as executor:
+        futures = {executor.submit(render_variants, str(path)): path for path in pending_originals()}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                generated += 1
+            except Exception as e:
+                failed += 1
+                print("Failed to generate variants for", futures[future].name, e)
+    print(f"Generated variants for {generated} images, {failed} failures")
+
+if __name__ == '__main__':
+    main()
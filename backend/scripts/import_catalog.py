@@ -0,0 +1,45 @@
+import argparse
+import asyncio
+import shutil
+from db import SessionLocal
+import models
+from core.cache import RESPONSE_CACHE_BACKEND, response_cache
+from core.ingest import IMPORT_DIR, create_import, import_format, run_import
+from core.tasks import enqueue_invalidation
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import services from an NDJSON or CSV file')
+    parser.add_argument('file', nargs='?', help='NDJSON/CSV file to import')
+    parser.add_argument('--owner-id', type=int, help='User id that will own the imported services')
+    parser.add_argument('--format', choices=['ndjson', 'jsonl', 'csv'])
+    parser.add_argument('--resume', type=int, metavar='IMPORT_ID', help='Resume a failed or interrupted import')
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.resume:
+            import_id = args.resume
+        else:
+            if not args.file or args.owner_id is None:
+                parser.error('file and --owner-id are required unless --resume is given')
+            file_format = import_format(args.file, args.format)
+            target = IMPORT_DIR / f"cli-{args.owner_id}-{args.file.replace('/', '_')}"
+            shutil.copyfile(args.file, target)
+            import_id = create_import(db, args.owner_id, target, file_format).id
+            print(f"Created import {import_id}")
+
+        job = run_import(db, import_id)
+        print(f"Import {job.id} {job.status}: {job.processed_rows} rows read, "
+              f"{job.inserted_rows} inserted, {job.error_count} errors")
+        if job.last_error:
+            print("Last error:", job.last_error)
+        if RESPONSE_CACHE_BACKEND == 'memory':
+            enqueue_invalidation(db, 'services')
+            db.commit()
+        else:
+            asyncio.run(response_cache.invalidate('services'))
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+from sqlalchemy import func, select
+from db import SessionLocal
+import models
+from models.favorite import Favorite as FavoriteModel
+from models.service import Service as ServiceModel
+
+def main():
+    db = SessionLocal()
+    try:
+        favorite_count = select(func.count()).where(
+            FavoriteModel.service_id == ServiceModel.id
+        ).correlate(ServiceModel).scalar_subquery()
+        updated = db.query(ServiceModel).update({'favorite_count': favorite_count}, synchronize_session=False)
+        db.commit()
+        print(f"Rebuilt favorite counts for {updated} services")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
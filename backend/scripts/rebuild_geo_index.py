@@ -0,0 +1,17 @@
+from db import SessionLocal
+from core.nearby import backfill_coordinates
+
+def main():
+    db = SessionLocal()
+    try:
+        parsed = skipped = 0
+        for batch_parsed, batch_skipped in backfill_coordinates(db):
+            db.commit()
+            parsed += batch_parsed
+            skipped += batch_skipped
+        print(f"Parsed coordinates for {parsed} services, {skipped} without a usable geolocation")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
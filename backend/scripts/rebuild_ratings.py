@@ -0,0 +1,21 @@
+import argparse
+from db import SessionLocal
+import models
+from core.ratings import rebuild_ratings
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild service_rating aggregates from the comment table')
+    parser.add_argument('--service-id', type=int, action='append', dest='service_ids',
+                        help='Only rebuild the given service (can be repeated)')
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rebuild_ratings(db, args.service_ids)
+        db.commit()
+        print("Rebuilt rating aggregates for", "all services" if args.service_ids is None else args.service_ids)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+from db import SessionLocal
+import models
+from core.search import backfill_search_text, ensure_search_index
+
+def main():
+    db = SessionLocal()
+    try:
+        updated = backfill_search_text(db)
+        ensure_search_index(db)
+        db.commit()
+        print(f"Indexed search text for {updated} services")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
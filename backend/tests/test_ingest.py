@@ -0,0 +1,76 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from core.ingest import IMPORT_STALE_SECONDS, is_resumable, run_import
+from models.catalog_import import CatalogImport as CatalogImportModel
+from models.service import Service as ServiceModel
+from models.service_image import ServiceImage as ServiceImageModel
+from models.user import User as UserModel
+
+def service_row(name, **extra):
+    return dict(
+        name=name, address='1 Tran Phu', geolocation='16.06, 108.22', website='https://example.com',
+        type='hotel', description='Sea view', email='info@example.com', phone='0123456789', **extra
+    )
+
+def write_rows(path, rows):
+    path.write_text(''.join(json.dumps(row) + '\n' for row in rows), encoding='utf-8')
+
+def create_job(db, owner_id, path, **values):
+    job = CatalogImportModel(owner_id=owner_id, file_path=str(path), format='ndjson', **values)
+    db.add(job)
+    db.commit()
+    return job
+
+def service_names(db):
+    return [row.name for row in db.query(ServiceModel.name).order_by(ServiceModel.id).all()]
+
+@pytest.fixture
+def owner_id(db):
+    owner = UserModel(full_name='Owner', user_name='owner', password='secret', role='business')
+    db.add(owner)
+    db.commit()
+    return owner.id
+
+def test_run_import_resumes_after_processed_rows(db, owner_id, tmp_path):
+    path = tmp_path / 'catalog.ndjson'
+    long_url = '/api/v1/service/images/' + 'x' * 4000 + '.jpg'
+    write_rows(path, [service_row('A'), service_row('B', image_urls=[long_url]), service_row('C')])
+    job = create_job(db, owner_id, path, status='failed', processed_rows=1, inserted_rows=1, last_error='crash')
+
+    assert is_resumable(db, job.id)
+    job = run_import(db, job.id)
+    assert (job.status, job.processed_rows, job.inserted_rows, job.last_error) == ('completed', 3, 3, None)
+    assert service_names(db) == ['B', 'C']
+    assert [row.image_url for row in db.query(ServiceImageModel.image_url).all()] == [long_url]
+    assert not path.exists()
+
+def test_failed_import_can_be_resumed(db, owner_id, tmp_path):
+    path = tmp_path / 'catalog.ndjson'
+    job = create_job(db, owner_id, path)
+
+    job = run_import(db, job.id)
+    assert job.status == 'failed'
+    assert is_resumable(db, job.id)
+
+    write_rows(path, [service_row('A'), service_row('B')])
+    job = run_import(db, job.id)
+    assert (job.status, job.inserted_rows) == ('completed', 2)
+    assert service_names(db) == ['A', 'B']
+
+def test_running_import_is_left_alone_until_stale(db, owner_id, tmp_path):
+    path = tmp_path / 'catalog.ndjson'
+    write_rows(path, [service_row('A')])
+    job = create_job(db, owner_id, path, status='running')
+
+    assert not is_resumable(db, job.id)
+    job = run_import(db, job.id)
+    assert (job.status, job.processed_rows) == ('running', 0)
+    assert service_names(db) == []
+
+    job.updated_at = datetime.utcnow() - timedelta(seconds=IMPORT_STALE_SECONDS + 60)
+    db.commit()
+    assert is_resumable(db, job.id)
+    job = run_import(db, job.id)
+    assert (job.status, job.processed_rows) == ('completed', 1)
+    assert service_names(db) == ['A']
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from core.jobs import (
+    JOB_LOCK_TIMEOUT, JOB_RETENTION_HOURS, JobRunner, backoff_seconds, claim_job, enqueue, fail_job, finish_job,
+    handlers, refresh_lock, requeue_stale_jobs,
+)
+from models.job import Job as JobModel
+
+def test_claim_job_takes_due_jobs_in_order(db):
+    enqueue(db, 'later', delay=60)
+    first = enqueue(db, 'first')
+    second = enqueue(db, 'second')
+    db.commit()
+
+    claimed = claim_job(db, 'worker-a')
+    assert claimed.id == first.id
+    assert (claimed.status, claimed.attempts, claimed.locked_by) == ('running', 1, 'worker-a')
+    assert claim_job(db, 'worker-b').id == second.id
+    assert claim_job(db, 'worker-c') is None
+
+def test_fail_job_backs_off_then_gives_up(db):
+    job = enqueue(db, 'flaky', max_attempts=2)
+    db.commit()
+
+    claim_job(db, 'worker')
+    before = datetime.utcnow()
+    assert fail_job(db, job.id, 'boom') == 'pending'
+    db.refresh(job)
+    assert job.locked_by is None
+    assert job.last_error == 'boom'
+    assert job.run_at >= before + timedelta(seconds=backoff_seconds(1))
+    assert claim_job(db, 'worker') is None
+
+    job.run_at = datetime.utcnow()
+    db.commit()
+    assert claim_job(db, 'worker').attempts == 2
+    assert fail_job(db, job.id, 'boom again') == 'failed'
+    job.run_at = datetime.utcnow()
+    db.commit()
+    assert claim_job(db, 'worker') is None
+
+def test_run_one_retries_failing_handler(db, session_factory, monkeypatch):
+    calls = []
+
+    def flaky(db, payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError('transient')
+
+    monkeypatch.setitem(handlers, 'test_flaky', flaky)
+    runner = JobRunner(0, 0)
+    runner.session_factory = session_factory
+    job = enqueue(db, 'test_flaky', {'value': 1})
+    db.commit()
+
+    assert runner.run_one(db, 'worker')
+    db.refresh(job)
+    assert job.status == 'pending'
+    assert 'transient' in job.last_error
+
+    job.run_at = datetime.utcnow()
+    db.commit()
+    assert runner.run_one(db, 'worker')
+    db.refresh(job)
+    assert job.status == 'done'
+    assert calls == [{'value': 1}, {'value': 1}]
+    assert not runner.run_one(db, 'worker')
+
+def test_requeue_stale_jobs_releases_abandoned_locks(db):
+    stale = enqueue(db, 'stale')
+    alive = enqueue(db, 'alive')
+    db.commit()
+    claim_job(db, 'dead-worker')
+    claim_job(db, 'live-worker')
+    stale.locked_at = datetime.utcnow() - timedelta(seconds=JOB_LOCK_TIMEOUT + 1)
+    alive.locked_at = datetime.utcnow() - timedelta(seconds=JOB_LOCK_TIMEOUT + 1)
+    db.commit()
+    refresh_lock(db, alive.id, 'live-worker')
+
+    requeued, _ = requeue_stale_jobs(db)
+    assert requeued == 1
+    db.refresh(stale)
+    db.refresh(alive)
+    assert (stale.status, stale.locked_by) == ('pending', None)
+    assert (alive.status, alive.locked_by) == ('running', 'live-worker')
+
+    reclaimed = claim_job(db, 'new-worker')
+    assert reclaimed.id == stale.id
+    assert reclaimed.attempts == 2
+
+def test_requeue_stale_jobs_purges_old_finished_jobs(db):
+    old = enqueue(db, 'old')
+    recent = enqueue(db, 'recent')
+    db.commit()
+    finish_job(db, old.id)
+    finish_job(db, recent.id)
+    old.updated_at = datetime.utcnow() - timedelta(hours=JOB_RETENTION_HOURS + 1)
+    db.commit()
+
+    assert requeue_stale_jobs(db) == (0, 1)
+    assert db.get(JobModel, recent.id) is not None
@@ -0,0 +1,29 @@
+import pytest
+from core.pagination import paginate
+from models.service import Service as ServiceModel
+
+LATITUDES = [3.0, None, 1.0, None, 2.0, 2.0, None, 1.0]
+
+def expected_order(services, descending):
+    def key(service):
+        if service.latitude is None:
+            return (1, 0, service.id)
+        return (0, -service.latitude if descending else service.latitude, service.id)
+    return [service.id for service in sorted(services, key=key)]
+
+@pytest.mark.parametrize('descending', [True, False])
+@pytest.mark.parametrize('limit', [1, 2, 3])
+def test_cursor_paging_covers_null_sort_keys(db, descending, limit):
+    services = [ServiceModel(name=f'Service {index}', latitude=latitude) for index, latitude in enumerate(LATITUDES)]
+    db.add_all(services)
+    db.commit()
+    ordering = [(ServiceModel.latitude, descending), (ServiceModel.id, False)]
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = paginate(db.query(ServiceModel.id), ordering, limit, cursor)
+        assert len(rows) <= limit
+        seen.extend(row.id for row in rows)
+        if cursor is None:
+            break
+    assert seen == expected_order(services, descending)